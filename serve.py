@@ -5,168 +5,2294 @@ Audit Hub — standalone QA testing server.
 Serves an interactive checklist UI backed by JSON files on disk.
 
 Usage:
-  python serve.py [audits-directory]
+  python serve.py [--workers N] [--trace FILE] [audits-directory ...]
+  python serve.py replay [--target URL] [--speed X] TRACE ...
 
   audits-directory: path to folder containing audit-*.json files
-                    (defaults to current working directory)
+                    (defaults to current working directory).
+                    Pass several to host many projects from one server;
+                    prefix a path with name= to choose its project name.
+  --workers N:      fork N server processes sharing the port (Unix only)
+  --trace FILE:     append a JSONL record of every request to FILE
+  replay:           re-send the GET requests of a trace to a running hub
 
 Examples:
   python serve.py tasks/audits
   python ~/.claude/skills/ralph-audit/serve.py tasks/audits
+  python serve.py api=~/src/api/tasks/audits web=~/src/web/tasks/audits
+  python serve.py --workers 4 tasks/audits
+  python serve.py --trace trace.jsonl tasks/audits
+  python serve.py replay --speed 10 trace.jsonl
 
 Then open http://localhost:4000
 Share via ngrok: ngrok http 4000
+
+Each project is served under /r/<project>/ (e.g. /r/api/api/audits).
+The unprefixed /api/audits/<feature>/... routes use the first project.
 """
+import argparse
+import base64
+import difflib
+import functools
+import gzip
+import hashlib
+import itertools
+import html
 import json
 import os
+import random
 import re
+import signal
 import sys
+import tempfile
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
-DIR = os.path.abspath(sys.argv[1]) if len(sys.argv) > 1 else os.getcwd()
+try:
+    import fcntl
+except ImportError:  # Windows: single process only, thread locks are enough
+    fcntl = None
+
 PORT = int(os.environ.get("AUDIT_PORT", 4000))
+# Largest accepted JSON request body; bigger uploads get 413 before being read.
+MAX_BODY = int(os.environ.get("AUDIT_MAX_BODY", 1024 * 1024))
+BODY_CHUNK = 64 * 1024
+# Largest accepted attachment upload; these stream to disk, not memory.
+MAX_UPLOAD = int(os.environ.get("AUDIT_MAX_UPLOAD", 20 * 1024 * 1024))
+# Seconds between group commits of saved results; 0 writes every save through.
+FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", 1.0))
+# Memory budget for parsed checklists kept for summaries and fingerprints, process-wide.
+CACHE_BYTES = int(os.environ.get("AUDIT_CACHE_BYTES", 32 * 1024 * 1024))
+# Seconds between checks for regenerated checklists whose results need re-keying.
+MIGRATE_INTERVAL = 2.0
+# Similarity (0-1) above which an edited story inherits its old verdict and notes.
+FUZZY_MATCH = 0.8
+
+# Size at which the request trace rotates to FILE.1 (keeping TRACE_BACKUPS old files).
+TRACE_MAX_BYTES = int(os.environ.get("AUDIT_TRACE_MAX_BYTES", 10 * 1024 * 1024))
+TRACE_BACKUPS = 3
+
+# name -> Root, in command-line order. Filled in by main().
+ROOTS = {}
+# TraceLog when --trace is given. Set by main().
+TRACE = None
+
+
+class HTTPError(Exception):
+    """Abort a request with an HTTP status; the message becomes the JSON error."""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers
+
+
+_disk = threading.local()
+
+
+@contextmanager
+def disk_io():
+    """Count the enclosed file I/O towards the current thread's request disk time."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _disk.ms = getattr(_disk, "ms", 0.0) + (time.perf_counter() - start) * 1000
 
 
 def validate_feature(feature):
     return bool(re.match(r"^[a-z0-9-]+$", feature))
 
 
-def list_audits():
+def validate_root(name):
+    return bool(re.match(r"^[a-z0-9_-]+$", name))
+
+
+def validate_story(story_id):
+    return bool(re.match(r"^[A-Za-z0-9_-]+$", story_id))
+
+
+def validate_checklist_hash(value):
+    """Checklist hashes name snapshot files, so only accept the 16 hex digits we generate."""
+    return isinstance(value, str) and bool(re.match(r"^[0-9a-f]{16}$", value))
+
+
+class Root:
+    """One audits directory served under /r/<name>/, with its own caches and lock."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.dir = os.path.abspath(os.path.expanduser(path))
+        self.lock = threading.Lock()
+        # feature -> ((audit signature, results updated_at), summary)
+        self.summaries = {}
+        self.results = ResultsStore(self)
+        # feature -> (checklist signature, (hash, {story id: story text}))
+        self.fingerprints = {}
+        self.rounds = RoundHistory(self)
+        # feature -> (results revision, etag, rendered report bytes)
+        self.reports = {}
+        self.events = EventLog(self)
+        self.leases = LeaseStore(self)
+
+    def path(self, fname):
+        return os.path.join(self.dir, fname)
+
+    def state_path(self, *parts):
+        """Path under the root's .hub/ directory of Hub-private state, creating parents."""
+        path = os.path.join(self.dir, ".hub", *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+
+def default_root_name(path):
+    """Name a root after its project: tasks/audits paths use the project folder."""
+    parts = os.path.abspath(os.path.expanduser(path)).split(os.sep)
+    while len(parts) > 1 and parts[-1] in ("audits", "tasks"):
+        parts.pop()
+    name = re.sub(r"[^a-z0-9_-]+", "-", parts[-1].lower()).strip("-")
+    return name or "default"
+
+
+def parse_roots(args):
+    roots = {}
+    for arg in args or [os.getcwd()]:
+        name, sep, path = arg.partition("=")
+        if not sep or os.path.isdir(arg):
+            name, path = default_root_name(arg), arg
+        if not validate_root(name):
+            sys.exit(f"Invalid project name {name!r}: use lowercase letters, digits, '-' and '_'")
+        if name in roots:
+            sys.exit(f"Duplicate project name {name!r}: use name=path to tell them apart")
+        roots[name] = Root(name, path)
+    return roots
+
+
+def get_root(name=None):
+    if name is None:
+        return next(iter(ROOTS.values()))
+    return ROOTS.get(name)
+
+
+def _signature(path):
+    """Cheap change detector for a file: (mtime_ns, size), or None if missing.
+
+    Caches key on this rather than on in-process state, so a write from
+    another worker process invalidates them too.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ChecklistCache:
+    """LRU of checklists bounded by bytes, shared by all roots.
+
+    Each entry holds the parsed checklist (treat it as read-only) for
+    summaries, fingerprints and timing, and is dropped once the file's mtime
+    or size changes. /checklist responses don't come from here; they are the
+    file itself (see open_checklist). An entry is charged at twice the file's
+    size, a rough figure for Python's per-object overhead on JSON data.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # path -> (signature, parsed checklist, cost in bytes)
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, path):
+        """The parsed checklist at path, or None if it doesn't exist."""
+        sig = _signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == sig:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            if entry:
+                self._remove(path)
+        if sig is None:
+            return None
+        with disk_io(), open(path) as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} is not a JSON object")
+        cost = 2 * sig[1]
+        if cost <= self.max_bytes:
+            with self._lock:
+                if path in self._entries:
+                    self._remove(path)
+                self._entries[path] = (sig, data, cost)
+                self.bytes += cost
+                while self.bytes > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+                    self.evictions += 1
+        return data
+
+    def _remove(self, path):
+        self.bytes -= self._entries.pop(path)[2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+CHECKLISTS = ChecklistCache(CACHE_BYTES)
+
+
+def _summarize(root, feature):
+    try:
+        checklist = get_checklist(root, feature)
+    except Exception:
+        return None
+    if checklist is None:
+        return None
+    total = sum(len(s.get("stories", [])) for s in checklist.get("sections", []))
+    pass_count = fail_count = skip_count = 0
+    try:
+        results = get_results(root, feature)
+    except Exception:
+        results = {}
+    verdicts = results.get("results")
+    # Files written before saves were validated may hold anything here.
+    for v in verdicts.values() if isinstance(verdicts, dict) else ():
+        if v == "pass":
+            pass_count += 1
+        elif v == "fail":
+            fail_count += 1
+        elif v == "skip":
+            skip_count += 1
+    return {
+        "root": root.name,
+        "feature": feature,
+        "title": checklist.get("feature", feature).replace("-", " ").title(),
+        "date": checklist.get("date"),
+        "total": total,
+        "pass": pass_count,
+        "fail": fail_count,
+        "skip": skip_count,
+        "remaining": total - pass_count - fail_count - skip_count,
+    }
+
+
+def list_audits(root):
+    """Summaries for one root. Checklists are only re-read when their mtime or size changes."""
+    try:
+        names = sorted(os.listdir(root.dir))
+    except OSError:
+        return []
     audits = []
-    for fname in sorted(os.listdir(DIR)):
+    seen = set()
+    for fname in names:
         if not fname.startswith("audit-") or not fname.endswith(".json"):
             continue
         feature = fname[len("audit-") : -len(".json")]
         try:
-            with open(os.path.join(DIR, fname)) as f:
-                checklist = json.load(f)
+            results_rev = get_results(root, feature).get("updated_at")
         except Exception:
-            continue
-        total = sum(len(s.get("stories", [])) for s in checklist.get("sections", []))
-        pass_count = fail_count = skip_count = 0
-        results_path = os.path.join(DIR, f"results-{feature}.json")
-        if os.path.exists(results_path):
-            try:
-                with open(results_path) as f:
-                    for v in json.load(f).get("results", {}).values():
-                        if v == "pass":
-                            pass_count += 1
-                        elif v == "fail":
-                            fail_count += 1
-                        elif v == "skip":
-                            skip_count += 1
-            except Exception:
-                pass
-        audits.append(
-            {
-                "feature": feature,
-                "title": checklist.get("feature", feature).replace("-", " ").title(),
-                "date": checklist.get("date"),
-                "total": total,
-                "pass": pass_count,
-                "fail": fail_count,
-                "skip": skip_count,
-                "remaining": total - pass_count - fail_count - skip_count,
-            }
-        )
+            results_rev = None
+        sig = (_signature(root.path(fname)), results_rev)
+        cached = root.summaries.get(feature)
+        if cached and cached[0] == sig:
+            summary = cached[1]
+        else:
+            summary = _summarize(root, feature)
+            if summary is None:
+                continue
+            with root.lock:
+                root.summaries[feature] = (sig, summary)
+        seen.add(feature)
+        audits.append(summary)
+    with root.lock:
+        for feature in set(root.summaries) - seen:
+            del root.summaries[feature]
     return audits
 
 
-def get_checklist(feature):
-    path = os.path.join(DIR, f"audit-{feature}.json")
-    if not os.path.exists(path):
+def list_all_audits():
+    """Combined sidebar: every root's audits, grouped in command-line order."""
+    audits = []
+    for root in ROOTS.values():
+        audits.extend(list_audits(root))
+    return audits
+
+
+AUDIT_STATUSES = {
+    "open": lambda a: a["remaining"] > 0,
+    "has-fails": lambda a: a["fail"] > 0,
+    "complete": lambda a: a["total"] > 0 and a["remaining"] == 0,
+}
+
+AUDIT_SORTS = {
+    "feature": lambda a: "",
+    "date": lambda a: a["date"] or "",
+    "title": lambda a: a["title"].lower(),
+    "progress": lambda a: round((a["total"] - a["remaining"]) / a["total"], 6) if a["total"] else 0,
+    "fails": lambda a: a["fail"],
+    "remaining": lambda a: a["remaining"],
+}
+
+
+def _cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _parse_cursor(token):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except ValueError:
+        raise HTTPError(400, "Invalid cursor")
+    if not isinstance(key, list) or len(key) != 3:
+        raise HTTPError(400, "Invalid cursor")
+    return tuple(key)
+
+
+def query_audits(audits, query):
+    """Filter, sort and page audit summaries by /api/audits query parameters.
+
+    status: open | has-fails | complete; since/until: YYYY-MM-DD bounds on
+    the audit date; q: text in title, feature or project; sort: one of
+    AUDIT_SORTS, prefixed with '-' for descending; limit and cursor page
+    through the result. Returns (page, total matches, next cursor or None).
+    """
+    def param(name):
+        return query.get(name, [""])[0].strip()
+
+    status, since, until, text = param("status"), param("since"), param("until"), param("q").lower()
+    if status and status not in AUDIT_STATUSES:
+        raise HTTPError(400, f"status must be one of: {', '.join(AUDIT_STATUSES)}")
+    sort = param("sort") or "feature"
+    descending = sort.startswith("-")
+    if sort.lstrip("-") not in AUDIT_SORTS:
+        raise HTTPError(400, f"sort must be one of: {', '.join(AUDIT_SORTS)}")
+    try:
+        limit = int(param("limit") or 0)
+    except ValueError:
+        raise HTTPError(400, "limit must be a number")
+
+    matches = [
+        a
+        for a in audits
+        if (not status or AUDIT_STATUSES[status](a))
+        and (not since or (a["date"] or "") >= since)
+        and (not until or (a["date"] or "\uffff") <= until)
+        and (not text or text in a["title"].lower() or text in a["feature"] or text in a["root"])
+    ]
+    # Ties (and the default sort) fall back to command-line project order, then filename.
+    order = {name: i for i, name in enumerate(ROOTS)}
+    primary = AUDIT_SORTS[sort.lstrip("-")]
+    keyed = sorted(
+        ((primary(a), order.get(a["root"], 0), a["feature"]), a) for a in matches
+    )
+    if descending:
+        keyed.reverse()
+    if param("cursor"):
+        after = _parse_cursor(param("cursor"))
+        try:
+            keyed = [(k, a) for k, a in keyed if (k < after if descending else k > after)]
+        except TypeError:
+            raise HTTPError(400, "Cursor does not match this sort")
+    if limit <= 0 or len(keyed) <= limit:
+        return [a for _, a in keyed], len(matches), None
+    page = keyed[:limit]
+    return [a for _, a in page], len(matches), _cursor(page[-1][0])
+
+
+def get_checklist(root, feature):
+    return CHECKLISTS.get(root.path(f"audit-{feature}.json"))
+
+
+# path -> (mtime_ns, size) of the last checklist version found to be a UTF-8 JSON object
+_sendable_checklists = {}
+
+
+def open_checklist(root, feature):
+    """Open a checklist to send byte-for-byte: (file, size, etag), or None.
+
+    The file on disk is already JSON, so there is no need to parse and
+    re-encode it per request. Each (mtime, size) version is parsed once to
+    check it is a UTF-8 JSON object; missing or malformed files return None.
+    """
+    path = root.path(f"audit-{feature}.json")
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
         return None
-    with open(path) as f:
-        return json.load(f)
+    try:
+        # fstat the open file, so the version checked is the one that gets sent
+        st = os.fstat(f.fileno())
+        sig = (st.st_mtime_ns, st.st_size)
+        if _sendable_checklists.get(path) != sig:
+            with disk_io():
+                raw = f.read()
+            try:
+                valid = isinstance(json.loads(raw.decode("utf-8")), dict)
+            except ValueError:
+                valid = False
+            if not valid:
+                f.close()
+                return None
+            _sendable_checklists[path] = sig
+        return f, st.st_size, f'"{sig[0]:x}-{sig[1]:x}"'
+    except BaseException:
+        f.close()
+        raise
+
+
+@contextmanager
+def feature_lock(root, feature):
+    """Hold the write lock for one feature across threads and worker processes."""
+    with root.lock:
+        if fcntl is None:
+            yield
+            return
+        with open(root.state_path("locks", f"{feature}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
 
 
-def get_results(feature):
-    path = os.path.join(DIR, f"results-{feature}.json")
-    if os.path.exists(path):
-        with open(path) as f:
-            return json.load(f)
-    return {"feature": feature, "updated_at": None, "results": {}, "notes": {}, "new_requirements": []}
+def write_json(path, data):
+    """Write via a temp file and rename, so readers never see a half-written file."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with disk_io():
+            os.chmod(tmp, 0o644)
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
 
 
-def save_results(feature, payload):
-    data = {
+def _read_results(path, feature):
+    if os.path.exists(path):
+        with disk_io(), open(path) as f:
+            return json.load(f)
+    return {
         "feature": feature,
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-        "results": payload.get("results", {}),
-        "notes": payload.get("notes", {}),
-        "new_requirements": payload.get("new_requirements", []),
+        "updated_at": None,
+        "checklist_hash": None,
+        "results": {},
+        "notes": {},
+        "new_requirements": [],
+        "retest": [],
+        "attachments": {},
     }
-    with open(os.path.join(DIR, f"results-{feature}.json"), "w") as f:
-        json.dump(data, f, indent=2)
-    return {"status": "saved", "updated_at": data["updated_at"]}
 
 
-class AuditHandler(SimpleHTTPRequestHandler):
-    def do_GET(self):
-        parsed = urlparse(self.path)
-        path = parsed.path.rstrip("/")
-
-        # API routes
-        if path == "/api/audits":
-            return self._json_response(list_audits())
-
-        m = re.match(r"^/api/audits/([^/]+)/checklist$", path)
-        if m:
-            feature = m.group(1)
-            if not validate_feature(feature):
-                return self._json_response({"error": "Invalid feature"}, 400)
-            data = get_checklist(feature)
-            if data is None:
-                return self._json_response({"error": "Not found"}, 404)
-            return self._json_response(data)
-
-        m = re.match(r"^/api/audits/([^/]+)/results$", path)
-        if m:
-            feature = m.group(1)
-            if not validate_feature(feature):
-                return self._json_response({"error": "Invalid feature"}, 400)
-            return self._json_response(get_results(feature))
-
-        # Serve HTML for root
-        if path in ("", "/index.html"):
-            self.send_response(200)
-            self.send_header("Content-Type", "text/html; charset=utf-8")
-            self.end_headers()
-            self.wfile.write(HUB_HTML.encode())
+class ResultsStore:
+    """Authoritative in-memory results for one root, written behind to disk.
+
+    Saves replace the in-memory copy and return immediately; flush() writes
+    every dirty feature in one pass (a group commit). Clean entries are
+    re-read when the file on disk changes, e.g. after another worker's flush.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        # feature -> {"data": results dict, "sig": disk signature it was based on, "dirty": bool}
+        self._entries = {}
+
+    def _path(self, feature):
+        return self.root.path(f"results-{feature}.json")
+
+    def get(self, feature):
+        path = self._path(feature)
+        sig = _signature(path)
+        with self._lock:
+            entry = self._entries.get(feature)
+            if entry and (entry["dirty"] or entry["sig"] == sig):
+                return entry["data"]
+        data = _read_results(path, feature)
+        with self._lock:
+            entry = self._entries.get(feature)
+            if entry and entry["dirty"]:
+                return entry["data"]
+            self._entries[feature] = {"data": data, "sig": sig, "dirty": False}
+        return data
+
+    def put(self, feature, payload, checklist_hash=None):
+        data = {
+            "feature": feature,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "checklist_hash": checklist_hash,
+            "results": payload.get("results", {}),
+            "notes": payload.get("notes", {}),
+            "new_requirements": payload.get("new_requirements", []),
+            "retest": payload.get("retest", []),
+            "attachments": payload.get("attachments", {}),
+        }
+        with self._lock:
+            old = self._entries.get(feature)
+            sig = old["sig"] if old else _signature(self._path(feature))
+            self._entries[feature] = {"data": data, "sig": sig, "dirty": True}
+        if FLUSH_INTERVAL <= 0:
+            self.flush()
+        return {"status": "saved", "updated_at": data["updated_at"]}
+
+    def replace(self, feature, expected, data):
+        """Swap in data unless a save landed after expected was read; returns the winner."""
+        with self._lock:
+            entry = self._entries.get(feature)
+            if entry is None or entry["data"] is not expected:
+                return entry["data"] if entry else expected
+            self._entries[feature] = {"data": data, "sig": entry["sig"], "dirty": True}
+        if FLUSH_INTERVAL <= 0:
+            self.flush()
+        return data
+
+    def flush(self):
+        """Write all dirty features to disk. Safe to call from any thread."""
+        with self._lock:
+            dirty = [(f, e) for f, e in self._entries.items() if e["dirty"]]
+        for feature, entry in dirty:
+            path = self._path(feature)
+            with feature_lock(self.root, feature):
+                data = entry["data"]
+                if _signature(path) != entry["sig"]:
+                    # Another worker flushed since we loaded; last save wins.
+                    on_disk = _read_results(path, feature)
+                    if (on_disk.get("updated_at") or "") > data["updated_at"]:
+                        data = None
+                if data is not None:
+                    write_json(path, data)
+                sig = _signature(path)
+            with self._lock:
+                if self._entries.get(feature) is entry:
+                    if data is None:
+                        del self._entries[feature]
+                    else:
+                        entry["dirty"] = False
+                        entry["sig"] = sig
+
+
+def story_text(story):
+    """Normalized title, steps and expected result: how a story is recognized across checklists."""
+    parts = [story.get("title", ""), *story.get("steps", []), story.get("expected", "")]
+    return re.sub(r"\s+", " ", "\n".join(str(p) for p in parts)).strip().lower()
+
+
+def checklist_fingerprint(root, feature):
+    """(hash, {story id: story text}) for the current checklist, or None if it can't be read."""
+    path = root.path(f"audit-{feature}.json")
+    sig = _signature(path)
+    if sig is None:
+        return None
+    cached = root.fingerprints.get(feature)
+    if cached and cached[0] == sig:
+        return cached[1]
+    try:
+        checklist = get_checklist(root, feature)
+        stories = {
+            str(story["id"]): story_text(story)
+            for section in checklist.get("sections", [])
+            for story in section.get("stories", [])
+        }
+    except Exception:
+        return None
+    digest = hashlib.sha256(json.dumps(stories, sort_keys=True).encode()).hexdigest()[:16]
+    fingerprint = (digest, stories)
+    with root.lock:
+        root.fingerprints[feature] = (sig, fingerprint)
+    return fingerprint
+
+
+def _snapshot_path(root, feature, checklist_hash):
+    return root.state_path("snapshots", f"{feature}-{checklist_hash}.json")
+
+
+def save_snapshot(root, feature, fingerprint):
+    """Keep the story texts results were recorded against, to re-key them if the checklist changes."""
+    path = _snapshot_path(root, feature, fingerprint[0])
+    if not os.path.exists(path):
+        write_json(path, fingerprint[1])
+
+
+def match_stories(old, new):
+    """Map old story ids to new ones by content.
+
+    Identical stories match first; the rest are paired greedily by
+    similarity above FUZZY_MATCH. Returns (old id -> new id, new ids that
+    are new or edited and so need testing again).
+    """
+    by_text = {}
+    for old_id, text in old.items():
+        by_text.setdefault(text, []).append(old_id)
+    mapping = {}
+    unmatched = []
+    for new_id, text in new.items():
+        if by_text.get(text):
+            mapping[by_text[text].pop(0)] = new_id
+        else:
+            unmatched.append(new_id)
+    leftover = [old_id for old_id in old if old_id not in mapping]
+    candidates = []
+    for new_id in unmatched:
+        for old_id in leftover:
+            matcher = difflib.SequenceMatcher(None, old[old_id], new[new_id])
+            if matcher.real_quick_ratio() < FUZZY_MATCH or matcher.quick_ratio() < FUZZY_MATCH:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= FUZZY_MATCH:
+                candidates.append((ratio, old_id, new_id))
+    taken = set()
+    for ratio, old_id, new_id in sorted(candidates, reverse=True):
+        if old_id not in mapping and new_id not in taken:
+            mapping[old_id] = new_id
+            taken.add(new_id)
+    return mapping, set(unmatched)
+
+
+def migrate_results(data, old, fingerprint):
+    """Re-key data recorded against checklist stories old onto the current fingerprint."""
+    mapping, changed = match_stories(old, fingerprint[1])
+
+    def rekey(values):
+        return {mapping[k]: v for k, v in values.items() if k in mapping}
+
+    retest = {mapping[k] for k in data.get("retest", []) if k in mapping} | changed
+    return dict(
+        data,
+        checklist_hash=fingerprint[0],
+        results=rekey(data.get("results", {})),
+        notes=rekey(data.get("notes", {})),
+        attachments=rekey(data.get("attachments", {})),
+        retest=sorted(retest, key=lambda k: (len(k), k)),
+    )
+
+
+def get_results(root, feature):
+    """Results for a feature, carried over to the current checklist if it was regenerated."""
+    data = root.results.get(feature)
+    fingerprint = checklist_fingerprint(root, feature)
+    if fingerprint is None or data.get("checklist_hash") == fingerprint[0] or data.get("updated_at") is None:
+        return data
+    if not validate_checklist_hash(data.get("checklist_hash")):
+        # Saved before fingerprints existed (or hand-edited): assume it matches the checklist on disk.
+        migrated = dict(data, checklist_hash=fingerprint[0])
+    else:
+        try:
+            with disk_io(), open(_snapshot_path(root, feature, data["checklist_hash"])) as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            return data
+        if not isinstance(old, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in old.items()):
+            return data
+        migrated = migrate_results(data, old, fingerprint)
+    save_snapshot(root, feature, fingerprint)
+    return root.results.replace(feature, data, migrated)
+
+
+def clean_attachments(value):
+    """Check attachments is {story id: [{sha256, name, type, size}]}, keeping only those fields."""
+    if not isinstance(value, dict):
+        raise HTTPError(400, "attachments must be an object")
+    cleaned = {}
+    for story_id, files in value.items():
+        if not isinstance(files, list):
+            raise HTTPError(400, "attachments must map story ids to lists")
+        for a in files:
+            if not (
+                isinstance(a, dict)
+                and isinstance(a.get("sha256"), str)
+                and re.match(r"^[0-9a-f]{64}$", a["sha256"])
+                and isinstance(a.get("name"), str)
+                and isinstance(a.get("type"), str)
+                and isinstance(a.get("size"), int)
+            ):
+                raise HTTPError(400, "Each attachment needs sha256, name, type and size")
+            cleaned.setdefault(story_id, []).append(
+                {"sha256": a["sha256"], "name": a["name"][:200], "type": a["type"][:100], "size": a["size"]}
+            )
+    return cleaned
+
+
+def save_results(root, feature, payload):
+    for field in ("results", "notes"):
+        if not isinstance(payload.get(field, {}), dict):
+            raise HTTPError(400, f"{field} must be an object")
+    if not isinstance(payload.get("new_requirements", []), list):
+        raise HTTPError(400, "new_requirements must be a list")
+    payload = dict(payload, attachments=clean_attachments(payload.get("attachments", {})))
+    fingerprint = checklist_fingerprint(root, feature)
+    # A page loaded before the checklist was regenerated still sends the old
+    # hash, so its ids get re-keyed on the next read instead of trusted.
+    checklist_hash = payload.get("checklist_hash")
+    if not validate_checklist_hash(checklist_hash):
+        checklist_hash = fingerprint and fingerprint[0]
+    if fingerprint and checklist_hash == fingerprint[0]:
+        save_snapshot(root, feature, fingerprint)
+    return root.results.put(feature, payload, checklist_hash)
+
+
+def add_attachment(root, feature, story_id, attachment):
+    """Record an uploaded file in the story's results, so it is kept even if the page never saves."""
+    while True:
+        data = get_results(root, feature)
+        files = data.get("attachments", {}).get(story_id, [])
+        if any(a.get("sha256") == attachment["sha256"] for a in files):
             return
+        fingerprint = checklist_fingerprint(root, feature)
+        updated = dict(
+            data,
+            updated_at=datetime.now(timezone.utc).isoformat(),
+            checklist_hash=data.get("checklist_hash") or (fingerprint and fingerprint[0]),
+            attachments=dict(data.get("attachments", {}), **{story_id: files + [attachment]}),
+        )
+        if root.results.replace(feature, data, updated) is updated:
+            return
+
+
+# Fields of a results file that rounds track. Dicts are diffed key by key.
+ROUND_FIELDS = {"results": {}, "notes": {}, "attachments": {}, "new_requirements": [], "retest": []}
+
+
+def diff_state(old, new):
+    """Delta turning state old into new: per-key set/unset for dicts, replace for the rest."""
+    delta = {}
+    for field, empty in ROUND_FIELDS.items():
+        a, b = old.get(field, empty), new.get(field, empty)
+        if isinstance(empty, dict):
+            changed = {k: v for k, v in b.items() if a.get(k) != v}
+            removed = [k for k in a if k not in b]
+            if changed:
+                delta.setdefault("set", {})[field] = changed
+            if removed:
+                delta.setdefault("unset", {})[field] = removed
+        elif a != b:
+            delta.setdefault("replace", {})[field] = b
+    return delta
+
+
+def apply_delta(state, delta):
+    state = {field: (dict(v) if isinstance(v, dict) else v) for field, v in state.items()}
+    for field, values in delta.get("set", {}).items():
+        state[field].update(values)
+    for field, keys in delta.get("unset", {}).items():
+        for k in keys:
+            state[field].pop(k, None)
+    for field, value in delta.get("replace", {}).items():
+        state[field] = value
+    return state
+
+
+class RoundHistory:
+    """Per-feature history of test rounds, kept in .hub/history/<feature>.jsonl.
+
+    Each line stores one round as a delta on the round before it, so the log
+    grows with what changed rather than with audit size. The log is parsed
+    incrementally (only bytes appended since the last read) and full states
+    are checkpointed in memory every CHECKPOINT_EVERY rounds, so looking up or
+    diffing rounds replays at most a few deltas.
+    """
+
+    CHECKPOINT_EVERY = 8
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        # feature -> {"offset", "rounds": [round meta + delta], "checkpoints": {n: state}, "last": state}
+        self._logs = {}
+
+    def _path(self, feature):
+        return self.root.state_path("history", f"{feature}.jsonl")
+
+    def _load(self, feature):
+        """Bring the in-memory log up to date with the file. Caller holds self._lock."""
+        empty = {field: (dict(v) if isinstance(v, dict) else list(v)) for field, v in ROUND_FIELDS.items()}
+        log = self._logs.get(feature)
+        path = self._path(feature)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if log is None or size < log["offset"]:
+            log = self._logs[feature] = {"offset": 0, "rounds": [], "checkpoints": {0: empty}, "last": empty}
+        if size > log["offset"]:
+            with disk_io(), open(path, "rb") as f:
+                f.seek(log["offset"])
+                chunk = f.read(size - log["offset"])
+            # Only consume complete lines; a partial one is picked up next time.
+            complete = chunk[: chunk.rfind(b"\n") + 1]
+            for line in complete.splitlines():
+                if line.strip():
+                    self._append(log, json.loads(line))
+            log["offset"] += len(complete)
+        return log
+
+    def _append(self, log, entry):
+        log["rounds"].append(entry)
+        log["last"] = apply_delta(log["last"], entry["delta"])
+        n = len(log["rounds"])
+        if n % self.CHECKPOINT_EVERY == 0:
+            log["checkpoints"][n] = log["last"]
+
+    def _state(self, log, n):
+        if n == len(log["rounds"]):
+            return log["last"]
+        base = n - n % self.CHECKPOINT_EVERY
+        state = log["checkpoints"][base]
+        for entry in log["rounds"][base:n]:
+            state = apply_delta(state, entry["delta"])
+        return state
+
+    @staticmethod
+    def _meta(entry):
+        delta = entry["delta"]
+        changes = sum(len(v) for v in delta.get("set", {}).values())
+        changes += sum(len(v) for v in delta.get("unset", {}).values())
+        changes += len(delta.get("replace", {}))
+        meta = {k: entry.get(k) for k in ("round", "at", "label", "checklist_hash")}
+        meta["changes"] = changes
+        return meta
+
+    def list(self, feature):
+        with self._lock:
+            return [self._meta(entry) for entry in self._load(feature)["rounds"]]
+
+    def close(self, feature, data, label=None):
+        """Record the current results as the next round."""
+        with feature_lock(self.root, feature), self._lock:
+            log = self._load(feature)
+            entry = {
+                "round": len(log["rounds"]) + 1,
+                "at": datetime.now(timezone.utc).isoformat(),
+                "label": label,
+                "checklist_hash": data.get("checklist_hash"),
+                "delta": diff_state(log["last"], data),
+            }
+            line = (json.dumps(entry) + "\n").encode()
+            with disk_io(), open(self._path(feature), "ab") as f:
+                f.write(line)
+            self._append(log, entry)
+            log["offset"] += len(line)
+            return self._meta(entry)
+
+    def _checked(self, log, n):
+        if not 0 <= n <= len(log["rounds"]):
+            raise HTTPError(404, f"No round {n}")
+        return n
+
+    def state(self, feature, n):
+        """Results as of round n (0 is the empty state before the first round)."""
+        with self._lock:
+            log = self._load(feature)
+            state = self._state(log, self._checked(log, n))
+            entry = log["rounds"][n - 1] if n else {}
+        return {
+            "feature": feature,
+            "round": n,
+            "at": entry.get("at"),
+            "checklist_hash": entry.get("checklist_hash"),
+            **state,
+        }
+
+    def diff(self, feature, a, b=None):
+        """What changed between rounds a and b (default: the latest round)."""
+        with self._lock:
+            log = self._load(feature)
+            b = len(log["rounds"]) if b is None else b
+            old = self._state(log, self._checked(log, a))
+            new = self._state(log, self._checked(log, b))
+        changes = {}
+        for field, empty in ROUND_FIELDS.items():
+            x, y = old.get(field, empty), new.get(field, empty)
+            if isinstance(empty, dict):
+                changed = {k: {"from": x.get(k), "to": y.get(k)} for k in set(x) | set(y) if x.get(k) != y.get(k)}
+                if changed:
+                    changes[field] = changed
+            elif x != y:
+                changes[field] = {"from": x, "to": y}
+        return {"feature": feature, "from": a, "to": b, "changes": changes}
+
+
+# Types served inline; anything else is sent as a download so uploads can't run script.
+INLINE_TYPES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def blob_path(root, digest):
+    return root.state_path("blobs", digest[:2], digest)
+
+
+def store_blob(root, chunks):
+    """Stream chunks into the root's content-addressed blob store; returns (sha256, size).
+
+    Identical content is stored once: the temp file is dropped if the blob exists.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    tmp_dir = os.path.join(root.dir, ".hub", "blobs", "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                hasher.update(chunk)
+                with disk_io():
+                    f.write(chunk)
+                size += len(chunk)
+        digest = hasher.hexdigest()
+        path = blob_path(root, digest)
+        if os.path.exists(path):
+            os.unlink(tmp)
+        else:
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return digest, size
+
+
+def blob_type(path):
+    with disk_io(), open(path, "rb") as f:
+        head = f.read(16)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, content_type in INLINE_TYPES:
+        if head.startswith(magic):
+            return content_type
+    return None
+
+
+def parse_range(header, size):
+    """(start, end) for a single 'bytes=' range, None to send everything, or HTTPError(416)."""
+    m = re.match(r"^bytes=(\d*)-(\d*)$", (header or "").strip())
+    if not m or not any(m.groups()):
+        return None  # absent, multi-range or unsupported unit: full response is allowed
+    first, last = m.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        raise HTTPError(416, "Requested range not satisfiable")
+    return start, end
+
+
+REPORT_CSS = """
+body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Arial, sans-serif;
+       color: #37352f; max-width: 760px; margin: 0 auto; padding: 24px 16px 64px; line-height: 1.5; }
+h1 { font-size: 28px; margin: 0 0 4px; }
+h2 { font-size: 18px; margin: 32px 0 8px; border-bottom: 1px solid #e8e7e4; padding-bottom: 4px; }
+.meta { color: #9b9a97; font-size: 14px; }
+.summary { display: flex; flex-wrap: wrap; gap: 16px; margin: 16px 0; font-size: 15px; }
+.pass { color: #2a7e33; } .fail { color: #c43333; } .skip { color: #9a7800; } .pending { color: #9b9a97; }
+.story { margin: 12px 0; padding: 8px 12px; border-left: 3px solid #e8e7e4; }
+.story.fail { border-color: #e03e3e; } .story.skip { border-color: #dfab01; }
+.story h3 { font-size: 15px; margin: 0 0 4px; }
+.section { color: #9b9a97; font-size: 12px; text-transform: uppercase; letter-spacing: 0.05em; }
+.note { background: #fbfbfa; padding: 6px 10px; border-radius: 4px; white-space: pre-wrap; }
+ol { margin: 4px 0; padding-left: 20px; font-size: 14px; }
+.expected { font-size: 14px; }
+img { max-width: 240px; max-height: 160px; margin: 4px 4px 0 0; border: 1px solid #e0dfdc; }
+li.done { color: #9b9a97; }
+"""
+
+
+def render_report(root, feature, checklist, data):
+    """JS-free HTML summary of an audit: failures first, then skips, untested and passes."""
+
+    def e(value):
+        # Results and checklists are hand-editable JSON; don't assume any field is a string
+        return html.escape(str(value))
+
+    def mapping(field):
+        value = data.get(field)
+        return value if isinstance(value, dict) else {}
+
+    results, notes, attachments = mapping("results"), mapping("notes"), mapping("attachments")
+    stories = [
+        (section.get("title", ""), story)
+        for section in checklist.get("sections", [])
+        for story in section.get("stories", [])
+    ]
+    counts = {"pass": 0, "fail": 0, "skip": 0}
+    for _, story in stories:
+        verdict = results.get(str(story.get("id")))
+        if verdict in counts:
+            counts[verdict] += 1
+    pending = len(stories) - sum(counts.values())
+    title = str(checklist.get("feature", feature)).replace("-", " ").title()
+
+    def detailed(section, story, verdict):
+        sid = str(story.get("id"))
+        out = [f'<div class="story {verdict}"><div class="section">{e(section)} &middot; #{e(sid)}</div>']
+        out.append(f"<h3>{e(story.get('title', ''))}</h3>")
+        out.append("<ol>" + "".join(f"<li>{e(step)}</li>" for step in story.get("steps", [])) + "</ol>")
+        out.append(f'<div class="expected"><b>Expected:</b> {e(story.get("expected", ""))}</div>')
+        if notes.get(sid):
+            out.append(f'<p class="note">{e(notes[sid])}</p>')
+        files = attachments.get(sid)
+        for a in files if isinstance(files, list) else []:
+            if not isinstance(a, dict):
+                continue
+            url = f"/r/{root.name}/blobs/{e(a.get('sha256', ''))}"
+            if str(a.get("type", "")).startswith("image/"):
+                out.append(f'<a href="{url}"><img src="{url}" alt="{e(a.get("name", ""))}" loading="lazy"></a>')
+            else:
+                out.append(f'<a href="{url}">{e(a.get("name", "attachment"))}</a> ')
+        out.append("</div>")
+        return "".join(out)
+
+    def brief(section, story):
+        sid = str(story.get("id"))
+        note = f" — {e(notes[sid])}" if notes.get(sid) else ""
+        return f"<li>{e(story.get('title', ''))} <span class=\"section\">{e(section)}</span>{note}</li>"
+
+    by_verdict = {"fail": [], "skip": [], None: [], "pass": []}
+    for section, story in stories:
+        verdict = results.get(str(story.get("id")))
+        by_verdict[verdict if verdict in by_verdict else None].append((section, story))
+
+    parts = [
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"UTF-8\">",
+        '<meta name="viewport" content="width=device-width, initial-scale=1.0">',
+        f"<title>{e(title)} — Audit Report</title><style>{REPORT_CSS}</style></head><body>",
+        f"<h1>{e(title)}</h1>",
+        f'<div class="meta">PRD: {e(checklist.get("prd") or "")} &middot; {e(checklist.get("date") or "")}'
+        f' &middot; updated {e(data.get("updated_at") or "never")}</div>',
+        '<div class="summary">',
+        f'<span class="pass">{counts["pass"]} passed</span>',
+        f'<span class="fail">{counts["fail"]} failed</span>',
+        f'<span class="skip">{counts["skip"]} skipped</span>',
+        f'<span class="pending">{pending} untested</span>',
+        f"<span>{len(stories)} total</span></div>",
+    ]
+    if by_verdict["fail"]:
+        parts.append(f"<h2>Failures ({len(by_verdict['fail'])})</h2>")
+        parts.extend(detailed(section, story, "fail") for section, story in by_verdict["fail"])
+    if by_verdict["skip"]:
+        parts.append(f"<h2>Skipped ({len(by_verdict['skip'])})</h2>")
+        parts.extend(detailed(section, story, "skip") for section, story in by_verdict["skip"])
+    if isinstance(data.get("new_requirements"), list) and data["new_requirements"]:
+        parts.append(f"<h2>New Requirements ({len(data['new_requirements'])})</h2><ul>")
+        parts.extend(f"<li>{e(req)}</li>" for req in data["new_requirements"])
+        parts.append("</ul>")
+    if by_verdict[None]:
+        parts.append(f"<h2>Untested ({len(by_verdict[None])})</h2><ul>")
+        parts.extend(brief(section, story) for section, story in by_verdict[None])
+        parts.append("</ul>")
+    if by_verdict["pass"]:
+        parts.append(f"<h2>Passed ({len(by_verdict['pass'])})</h2><ul>")
+        parts.extend(brief(section, story).replace("<li>", '<li class="done">', 1) for section, story in by_verdict["pass"])
+        parts.append("</ul>")
+    parts.append("</body></html>")
+    return "".join(parts).encode()
+
+
+def get_report(root, feature):
+    """(etag, html bytes) for a feature's report, rendered once per results revision."""
+    checklist_sig = _signature(root.path(f"audit-{feature}.json"))
+    if checklist_sig is None:
+        return None
+    data = get_results(root, feature)
+    revision = (checklist_sig, data.get("updated_at"), data.get("checklist_hash"))
+    cached = root.reports.get(feature)
+    if cached and cached[0] == revision:
+        return cached[1], cached[2]
+    checklist = get_checklist(root, feature)
+    if checklist is None:
+        return None
+    body = render_report(root, feature, checklist, data)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+    with root.lock:
+        root.reports[feature] = (revision, etag, body)
+    return etag, body
+
+
+EVENT_TYPES = ("open", "close", "verdict")
+MAX_EVENT_BATCH = 500
+# Verdict clicks on one story this close together are one decision (e.g. cycling the checkbox).
+VERDICT_SETTLE_MS = 30 * 1000
+
+
+def _median(values):
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    if not ordered:
+        return None
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) // 2
+
+
+class EventLog:
+    """Append-only tester activity log per feature, in .hub/events/<feature>.jsonl.
+
+    Appends use their own file lock, never the results lock, so logging
+    can't slow down saves. Aggregates are folded in incrementally from the
+    bytes appended since the last read.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        # feature -> {"offset": bytes folded in, "events": count, "stories": {id: stats},
+        #             "pending": {(session, story): verdict decision still settling}}
+        self._stats = {}
+
+    def _path(self, feature):
+        return self.root.state_path("events", f"{feature}.jsonl")
+
+    def append(self, feature, events):
+        """Validate and append a batch of UI events; returns how many were kept."""
+        now = datetime.now(timezone.utc).isoformat()
+        lines = []
+        for event in events[:MAX_EVENT_BATCH]:
+            if not isinstance(event, dict):
+                continue
+            story, kind = str(event.get("story", "")), event.get("type")
+            if kind not in EVENT_TYPES or not validate_story(story):
+                continue
+            record = {"at": now, "story": story, "type": kind, "session": str(event.get("session", ""))[:64]}
+            if isinstance(event.get("ms"), int) and 0 <= event["ms"] <= 24 * 3600 * 1000:
+                record["ms"] = event["ms"]
+            if isinstance(event.get("t"), int):
+                record["t"] = event["t"]
+            if kind == "verdict":
+                record["verdict"] = event.get("verdict") if event.get("verdict") in ("pass", "fail", "skip") else None
+                record["previous"] = event.get("previous") if event.get("previous") in ("pass", "fail", "skip") else None
+            lines.append(json.dumps(record) + "\n")
+        if lines:
+            with disk_io(), open(self._path(feature), "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.write("".join(lines))
+        return len(lines)
+
+    @staticmethod
+    def _story(stories, story_id):
+        return stories.setdefault(story_id, {"durations": [], "opens": 0, "verdicts": 0, "flips": 0})
+
+    @classmethod
+    def _settle(cls, stories, story_id, decision):
+        """Count one decision: the verdict a tester ended on, against the one they started from."""
+        if decision["verdict"] == decision["previous"]:
+            return  # clicked back to where they started
+        story = cls._story(stories, story_id)
+        story["verdicts"] += 1
+        if decision["ms"] is not None:
+            story["durations"].append(decision["ms"])
+        if decision["previous"]:
+            story["flips"] += 1
+
+    def _fold(self, stats, record):
+        """Fold one event in. Verdicts stay pending until the story is opened or closed
+        again, or VERDICT_SETTLE_MS passes, so a run of clicks counts once."""
+        stats["events"] += 1
+        key = (record.get("session", ""), record["story"])
+        pending = stats["pending"]
+        if record["type"] == "verdict":
+            t = record.get("t")
+            if t is None:
+                t = datetime.fromisoformat(record["at"]).timestamp() * 1000
+            decision = pending.get(key)
+            if decision and t - decision["t"] <= VERDICT_SETTLE_MS:
+                decision.update(verdict=record.get("verdict"), ms=record.get("ms"), t=t)
+                return
+            if decision:
+                self._settle(stats["stories"], record["story"], decision)
+            pending[key] = {"previous": record.get("previous"), "verdict": record.get("verdict"), "ms": record.get("ms"), "t": t}
+            return
+        if key in pending:
+            self._settle(stats["stories"], record["story"], pending.pop(key))
+        if record["type"] == "open":
+            self._story(stats["stories"], record["story"])["opens"] += 1
+
+    def timing(self, feature, checklist):
+        """Median time to verdict per story and per section, plus stories that flip verdicts."""
+        path = self._path(feature)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        with self._lock:
+            stats = self._stats.get(feature)
+            if stats is None or size < stats["offset"]:
+                stats = self._stats[feature] = {"offset": 0, "events": 0, "stories": {}, "pending": {}}
+            if size > stats["offset"]:
+                with disk_io(), open(path, "rb") as f:
+                    f.seek(stats["offset"])
+                    chunk = f.read(size - stats["offset"])
+                complete = chunk[: chunk.rfind(b"\n") + 1]
+                for line in complete.splitlines():
+                    try:
+                        self._fold(stats, json.loads(line))
+                    except (ValueError, KeyError):
+                        continue
+                stats["offset"] += len(complete)
+            per_story = {sid: dict(s, durations=list(s["durations"])) for sid, s in stats["stories"].items()}
+            # Report decisions still settling as if they were final, without settling them yet
+            for (session, story_id), decision in stats["pending"].items():
+                self._settle(per_story, story_id, decision)
+            total = stats["events"]
+
+        titles, sections = {}, []
+        for section in (checklist or {}).get("sections", []):
+            ids = [str(story.get("id")) for story in section.get("stories", [])]
+            titles.update((str(story.get("id")), story.get("title")) for story in section.get("stories", []))
+            durations = [ms for sid in ids for ms in per_story.get(sid, {}).get("durations", [])]
+            sections.append({"title": section.get("title"), "median_ms": _median(durations), "samples": len(durations)})
+        stories = [
+            {
+                "id": sid,
+                "title": titles.get(sid),
+                "median_ms": _median(s["durations"]),
+                "samples": len(s["durations"]),
+                "opens": s["opens"],
+                "verdicts": s["verdicts"],
+                "flips": s["flips"],
+            }
+            for sid, s in sorted(per_story.items(), key=lambda item: (len(item[0]), item[0]))
+        ]
+        flipping = sorted((s for s in stories if s["flips"] >= 2), key=lambda s: -s["flips"])
+        return {"feature": feature, "events": total, "stories": stories, "sections": sections, "flipping": flipping}
+
+
+# Seconds a claim on stories lasts without a heartbeat; the UI renews it while the tester is active.
+LEASE_TTL = int(os.environ.get("AUDIT_LEASE_TTL", 300))
+MAX_LEASE_TTL = 3600
+MAX_LEASE_BATCH = 100
+
+
+class LeaseStore:
+    """Which tester is working on which stories, so parallel testers split a checklist.
+
+    Leases live in .hub/leases/<feature>.json as story id -> {tester, since,
+    expires} and are rewritten under feature_lock, so every worker process
+    sees the same claims. Expiry is an absolute time: expired leases are
+    ignored on read and dropped on the next write.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, feature):
+        return self.root.state_path("leases", f"{feature}.json")
+
+    def _load(self, feature, now):
+        try:
+            with disk_io(), open(self._path(feature)) as f:
+                leases = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {story: lease for story, lease in leases.items() if lease["expires"] > now}
+
+    @staticmethod
+    def _view(leases, now):
+        return {
+            story: {"tester": lease["tester"], "since": lease["since"], "expires_in": round(lease["expires"] - now)}
+            for story, lease in leases.items()
+        }
+
+    def list(self, feature):
+        now = time.time()
+        return {"ttl": LEASE_TTL, "leases": self._view(self._load(feature, now), now)}
+
+    def _update(self, feature, change):
+        """Apply change(leases, now) under the feature lock and return its result plus the new leases."""
+        with feature_lock(self.root, feature):
+            now = time.time()
+            leases = self._load(feature, now)
+            result = change(leases, now)
+            write_json(self._path(feature), leases)
+        result["leases"] = self._view(leases, now)
+        return result
+
+    @staticmethod
+    def _take(leases, now, tester, stories, ttl):
+        claimed, held = [], {}
+        since = datetime.now(timezone.utc).isoformat()
+        for story in stories:
+            lease = leases.get(story)
+            if lease and lease["tester"] != tester:
+                held[story] = lease["tester"]
+                continue
+            leases[story] = {"tester": tester, "since": lease["since"] if lease else since, "expires": now + ttl}
+            claimed.append(story)
+        return {"claimed": claimed, "held": held}
+
+    def claim(self, feature, tester, stories, ttl=LEASE_TTL):
+        """Lease the given stories to tester, skipping (and reporting) those someone else holds."""
+        return self._update(feature, lambda leases, now: self._take(leases, now, tester, stories, ttl))
+
+    def claim_next(self, feature, tester, order, done, count, ttl=LEASE_TTL):
+        """Release tester's finished stories, then lease the next count that are untested and unclaimed."""
+
+        def change(leases, now):
+            for story in [s for s, lease in leases.items() if lease["tester"] == tester and s in done]:
+                del leases[story]
+            batch = [story for story in order if story not in done and story not in leases][:count]
+            return self._take(leases, now, tester, batch, ttl)
+
+        return self._update(feature, change)
+
+    def heartbeat(self, feature, tester, ttl=LEASE_TTL):
+        """Push back the expiry of every lease tester holds."""
+
+        def change(leases, now):
+            mine = [lease for lease in leases.values() if lease["tester"] == tester]
+            for lease in mine:
+                lease["expires"] = now + ttl
+            return {"renewed": len(mine)}
+
+        return self._update(feature, change)
+
+    def release(self, feature, tester, stories=None):
+        """Drop tester's leases, or only those on the given stories."""
+
+        def change(leases, now):
+            mine = [s for s, lease in leases.items() if lease["tester"] == tester and (stories is None or s in stories)]
+            for story in mine:
+                del leases[story]
+            return {"released": mine}
+
+        return self._update(feature, change)
+
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from have in into is it of on or should so that the this to with we need "
+    "needs needed want would like add allow able".split()
+)
+# 32 bands of 2 rows: texts with ~0.3 Jaccard similarity still share a band.
+MINHASH_BANDS, MINHASH_ROWS = 32, 2
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(4000)  # fixed seed: signatures must agree across runs and workers
+MINHASH_PERMS = [
+    (_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+# Estimated Jaccard similarity at which two requirements count as the same idea,
+# and the looser bar for suggesting matches to a half-typed requirement.
+DUPLICATE_SIMILARITY = 0.5
+SUGGEST_SIMILARITY = 0.3
+
+
+def shingles(text):
+    """Content words, lightly stemmed, so rewordings of one idea share most shingles."""
+    words = set()
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in STOPWORDS:
+            continue
+        for suffix in ("ing", "ed", "es", "s"):
+            if len(word) > len(suffix) + 3 and word.endswith(suffix):
+                word = word[: -len(suffix)]
+                break
+        words.add(word)
+    return words
+
+
+def minhash(text):
+    """MinHash signature of a text's shingles, or None if it has no content words."""
+    shingles_ = shingles(text)
+    if not shingles_:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(sh.encode(), digest_size=8).digest(), "big") for sh in shingles_]
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in MINHASH_PERMS)
+
+
+def _bands(signature):
+    return [
+        (band, signature[band * MINHASH_ROWS : (band + 1) * MINHASH_ROWS]) for band in range(MINHASH_BANDS)
+    ]
+
+
+def _similarity(a, b):
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class RequirementIndex:
+    """Near-duplicate index of new_requirements across every audit of every root.
+
+    Texts are MinHashed and bucketed by LSH bands, so finding look-alikes only
+    compares against texts sharing a band instead of the whole corpus. Each
+    audit's requirements are re-indexed only when its results change.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # doc id -> {"root", "feature", "text", "signature"}
+        self._docs = {}
+        # (root, feature) -> (results updated_at, [doc ids])
+        self._sources = {}
+        # (band, rows) -> set of doc ids
+        self._buckets = {}
+        self._refreshed_at = 0.0
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id)
+        for key in _bands(doc["signature"]):
+            bucket = self._buckets.get(key)
+            if bucket:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _add(self, root, feature, text):
+        signature = minhash(text)
+        if signature is None:
+            return None
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = {"root": root, "feature": feature, "text": text, "signature": signature}
+        for key in _bands(signature):
+            self._buckets.setdefault(key, set()).add(doc_id)
+        return doc_id
+
+    def refresh(self, max_age=0.0):
+        """Re-index audits whose results changed, unless refreshed within max_age seconds."""
+        if time.monotonic() - self._refreshed_at < max_age:
+            return
+        self._refreshed_at = time.monotonic()
+        current = {}
+        for root in ROOTS.values():
+            for audit in list_audits(root):
+                data = get_results(root, audit["feature"])
+                texts = data.get("new_requirements")
+                current[(root.name, audit["feature"])] = (data.get("updated_at"), texts if isinstance(texts, list) else [])
+        with self._lock:
+            for key in set(self._sources) - set(current):
+                for doc_id in self._sources.pop(key)[1]:
+                    self._remove(doc_id)
+            for key, (revision, texts) in current.items():
+                known = self._sources.get(key)
+                if known and known[0] == revision:
+                    continue
+                for doc_id in known[1] if known else []:
+                    self._remove(doc_id)
+                ids = [self._add(key[0], key[1], str(text)) for text in texts]
+                self._sources[key] = (revision, [i for i in ids if i is not None])
+
+    def _candidates(self, signature):
+        found = set()
+        for key in _bands(signature):
+            found |= self._buckets.get(key, set())
+        return found
+
+    def similar(self, text, limit=5, threshold=SUGGEST_SIMILARITY):
+        """Indexed requirements that look like text, most similar first."""
+        signature = minhash(text)
+        if signature is None:
+            return []
+        # Called on every keystroke: a second-old view of other audits is fine.
+        self.refresh(max_age=1.0)
+        with self._lock:
+            scored = []
+            for doc_id in self._candidates(signature):
+                doc = self._docs[doc_id]
+                score = _similarity(signature, doc["signature"])
+                if score >= threshold:
+                    scored.append((score, doc))
+        scored.sort(key=lambda item: -item[0])
+        return [
+            {"root": doc["root"], "feature": doc["feature"], "text": doc["text"], "similarity": round(score, 2)}
+            for score, doc in scored[:limit]
+        ]
+
+    def clusters(self, threshold=DUPLICATE_SIMILARITY):
+        """Every requirement, grouped with its near-duplicates; biggest groups first."""
+        self.refresh()
+        with self._lock:
+            parent = {doc_id: doc_id for doc_id in self._docs}
+
+            def find(x):
+                while parent[x] != x:
+                    parent[x] = parent[parent[x]]
+                    x = parent[x]
+                return x
+
+            for bucket in self._buckets.values():
+                members = sorted(bucket)
+                for i, a in enumerate(members):
+                    for b in members[i + 1 :]:
+                        if find(a) != find(b) and _similarity(self._docs[a]["signature"], self._docs[b]["signature"]) >= threshold:
+                            parent[find(a)] = find(b)
+            groups = {}
+            for doc_id in sorted(self._docs):
+                groups.setdefault(find(doc_id), []).append(self._docs[doc_id])
+        clusters = []
+        for docs in groups.values():
+            items = [{"root": d["root"], "feature": d["feature"], "text": d["text"]} for d in docs]
+            counts = {}
+            for d in docs:
+                counts[d["text"]] = counts.get(d["text"], 0) + 1
+            # Most common wording; ties go to the most descriptive one
+            text = max(counts, key=lambda t: (counts[t], len(t)))
+            clusters.append({"text": text, "count": len(items), "items": items})
+        clusters.sort(key=lambda c: (-c["count"], c["text"].lower()))
+        return clusters
+
+
+REQUIREMENTS = RequirementIndex()
+
+
+class TraceLog:
+    """Append-only JSONL request trace, rotated by size and shared by all workers.
+
+    Every record is one write() on an O_APPEND descriptor, so lines from
+    different threads and processes never interleave. Rotation happens under
+    an flock; workers notice the file was renamed and reopen it.
+    """
+
+    def __init__(self, path, max_bytes=TRACE_MAX_BYTES):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._fd = None
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _stale(self):
+        """True when another worker rotated the file out from under our descriptor."""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _rotate(self):
+        with open(self.path + ".lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another worker may have rotated while we waited for the lock
+            if not self._stale() and os.fstat(self._fd).st_size >= self.max_bytes:
+                for n in range(TRACE_BACKUPS - 1, 0, -1):
+                    if os.path.exists(f"{self.path}.{n}"):
+                        os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+                os.replace(self.path, self.path + ".1")
+        self._open()
+
+    def write(self, record):
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        with self._lock:
+            try:
+                if self._fd is None or self._stale():
+                    self._open()
+                os.write(self._fd, line)
+                if os.fstat(self._fd).st_size >= self.max_bytes:
+                    self._rotate()
+            except OSError as e:
+                print(f"Failed to write request trace {self.path}: {e}", file=sys.stderr)
+
+
+def flush_all():
+    for root in ROOTS.values():
+        try:
+            root.results.flush()
+        except OSError as e:
+            print(f"Failed to flush results in {root.dir}: {e}", file=sys.stderr)
+
+
+def start_flusher():
+    """Group-commit dirty results every FLUSH_INTERVAL seconds on a daemon thread."""
+    if FLUSH_INTERVAL <= 0:
+        return
+
+    def loop():
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            flush_all()
+
+    threading.Thread(target=loop, name="results-flusher", daemon=True).start()
+
+
+def migrate_all():
+    """Re-key every results file whose checklist was regenerated since it was saved."""
+    for root in ROOTS.values():
+        try:
+            names = os.listdir(root.dir)
+        except OSError:
+            continue
+        for name in names:
+            m = re.match(r"^results-([a-z0-9-]+)\.json$", name)
+            if m:
+                try:
+                    get_results(root, m.group(1))
+                except Exception as e:
+                    print(f"Failed to migrate {root.path(name)}: {e}", file=sys.stderr)
 
-        self.send_error(404)
 
-    def do_POST(self):
-        parsed = urlparse(self.path)
-        path = parsed.path.rstrip("/")
+def start_migrator():
+    """Migrate results soon after /audit rewrites a checklist, not only when a browser next asks.
 
-        m = re.match(r"^/api/audits/([^/]+)/results$", path)
-        if m:
-            feature = m.group(1)
-            if not validate_feature(feature):
-                return self._json_response({"error": "Invalid feature"}, 400)
-            length = int(self.headers.get("Content-Length", 0))
-            payload = json.loads(self.rfile.read(length))
-            return self._json_response(save_results(feature, payload))
+    Skills read results-*.json straight from disk, so they would otherwise
+    see verdicts under the old story ids.
+    """
 
-        self.send_error(404)
+    def loop():
+        while True:
+            time.sleep(MIGRATE_INTERVAL)
+            migrate_all()
 
-    def _json_response(self, data, status=200):
-        body = json.dumps(data).encode()
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(body)))
+    threading.Thread(target=loop, name="results-migrator", daemon=True).start()
+
+
+def run_server(server):
+    """Serve until interrupted, then flush any results still held in memory."""
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    start_flusher()
+    start_migrator()
+    try:
+        server.serve_forever()
+    finally:
+        # Don't let a second Ctrl+C or SIGTERM cut the final flush short
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        flush_all()
+
+
+class HubServer(ThreadingHTTPServer):
+    # socketserver's default listen backlog of 5 drops bursts of connections,
+    # which clients only retry after a one-second SYN timeout.
+    request_queue_size = 128
+
+
+class Response:
+    """A response as data, so middleware can inspect and rewrite it before it is sent.
+
+    file is (open binary file, offset, length) for bodies streamed from disk
+    with sendfile. It is closed once sent; middleware that replaces a response
+    must close() the one it drops.
+    """
+
+    def __init__(self, body=b"", status=200, content_type=None, headers=None, etag=None, file=None):
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+        if content_type:
+            self.headers["Content-Type"] = content_type
+        self.etag = etag
+        self.file = file
+
+    def close(self):
+        if self.file:
+            self.file[0].close()
+
+
+def json_response(data, status=200, headers=None):
+    return Response(json.dumps(data).encode(), status, "application/json", headers)
+
+
+# Route parameter -> (regex, validator). Validation failures are 400s, not 404s.
+ROUTE_PARAMS = {
+    "feature": (r"[^/]+", validate_feature),
+    "story": (r"[^/]+", validate_story),
+    "sha256": (r"[0-9a-f]{64}", None),
+    "n": (r"\d+", None),
+    "asset": (r"[^/]+", None),
+}
+
+
+class Route:
+    """One endpoint. Global routes only match unprefixed paths; the rest are per project."""
+
+    def __init__(self, method, pattern, handler, body_limit=MAX_BODY, scope="root"):
+        self.method = method
+        self.pattern = pattern
+        self.handler = handler
+        self.body_limit = body_limit
+        self.scope = scope
+
+    def regex(self, prefix):
+        regex, pos = "", 0
+        for m in re.finditer(r"\{(\w+)\}", self.pattern):
+            param = m.group(1)
+            regex += re.escape(self.pattern[pos : m.start()]) + f"(?P<{prefix}{param}>{ROUTE_PARAMS[param][0]})"
+            pos = m.end()
+        return regex + re.escape(self.pattern[pos:])
+
+
+class Router:
+    """Dispatch table compiled once at startup.
+
+    Fixed paths are a dict lookup. Patterned routes for each method and scope
+    are joined into a single alternation, so matching is one regex call
+    however many routes there are; the outer group that matched names the route.
+    """
+
+    def __init__(self, routes):
+        self.static = {}
+        self.dynamic = {}
+        patterned = {}
+        for route in routes:
+            key = (route.method, route.scope)
+            if "{" in route.pattern:
+                patterned.setdefault(key, []).append(route)
+            else:
+                self.static[key + (route.pattern,)] = route
+        for key, group in patterned.items():
+            alternatives, targets = [], {}
+            for i, route in enumerate(group):
+                prefix = f"r{i}_"
+                alternatives.append(f"(?P<r{i}>{route.regex(prefix)})")
+                params = re.findall(r"\{(\w+)\}", route.pattern)
+                targets[f"r{i}"] = (route, [(param, prefix + param) for param in params])
+            self.dynamic[key] = (re.compile("^(?:" + "|".join(alternatives) + ")$"), targets)
+
+    def _find(self, method, scope, path):
+        route = self.static.get((method, scope, path))
+        if route is not None:
+            return route, {}
+        regex, targets = self.dynamic.get((method, scope), (None, None))
+        m = regex.match(path) if regex else None
+        if m is None:
+            return None
+        route, groups = targets[m.lastgroup]
+        return route, {param: m.group(group) for param, group in groups}
+
+    def match(self, method, path):
+        """Resolve a request to (route, root, params, route name), or raise HTTPError."""
+        root, rest, prefix = None, path, ""
+        found = self._find(method, "global", path)
+        if found is None:
+            m = re.match(r"^/r/([^/]+)(/.*)?$", path)
+            if m:
+                root = get_root(m.group(1))
+                if root is None:
+                    raise HTTPError(404, "Unknown project")
+                rest, prefix = m.group(2) or "", "/r/{root}"
+            else:
+                root = get_root()
+            found = self._find(method, "root", rest)
+        if found is None:
+            allowed = [
+                other
+                for other in ("GET", "POST")
+                if other != method and (self._find(other, "global", path) or self._find(other, "root", rest))
+            ]
+            if allowed:
+                raise HTTPError(405, "Method not allowed", {"Allow": ", ".join(allowed)})
+            raise HTTPError(404, "Not found")
+        route, params = found
+        for param, value in params.items():
+            validator = ROUTE_PARAMS[param][1]
+            if validator is not None and not validator(value):
+                raise HTTPError(400, f"Invalid {param}")
+        return route, root, params, prefix + (route.pattern or "/")
+
+
+def build_pipeline(middleware, endpoint):
+    """Wrap endpoint in middleware, listed outermost first. Done once, not per request."""
+    app = endpoint
+    for layer in reversed(middleware):
+        app = functools.partial(layer, app)
+    return app
+
+
+def error_middleware(app, req):
+    """Turn HTTPError and unexpected exceptions into JSON error responses."""
+    try:
+        return app(req)
+    except HTTPError as e:
+        return json_response({"error": str(e)}, e.status, e.headers)
+    except ConnectionError:
+        raise
+    except Exception:
+        print(f"Error handling {req.command} {req.path}:\n{traceback.format_exc()}", file=sys.stderr)
+        req.close_connection = True
+        return json_response({"error": "Internal server error"}, 500)
+
+
+def timing_middleware(app, req):
+    start = time.perf_counter()
+    response = app(req)
+    elapsed = (time.perf_counter() - start) * 1000
+    response.headers["Server-Timing"] = f"app;dur={elapsed:.1f}, disk;dur={getattr(_disk, 'ms', 0.0):.1f}"
+    return response
+
+
+def routing_middleware(app, req):
+    req.route, req.root, req.params, req.route_name = ROUTER.match(
+        "GET" if req.command == "HEAD" else req.command, req.url.path.rstrip("/")
+    )
+    return app(req)
+
+
+def body_limit_middleware(app, req):
+    """Refuse a declared body over the route's limit before the route starts reading it."""
+    req.body_limit = req.route.body_limit
+    length = req.headers.get("Content-Length", "")
+    if length.isdigit() and int(length) > req.body_limit:
+        req.close_connection = True
+        raise HTTPError(413, f"Request body exceeds {req.body_limit} bytes")
+    return app(req)
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    tags = [tag.strip() for tag in header.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def conditional_get_middleware(app, req):
+    """Answer 304 when the client already has the response's ETag."""
+    response = app(req)
+    if (
+        req.command in ("GET", "HEAD")
+        and response.status in (200, 206)
+        and response.etag
+        and etag_matches(req.headers.get("If-None-Match"), response.etag)
+    ):
+        kept = {name: value for name, value in response.headers.items() if name in ("Cache-Control", "Vary")}
+        response.close()
+        return Response(status=304, headers=kept, etag=response.etag)
+    return response
+
+
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "text/")
+# Below this a gzip header and round trip cost more than they save.
+GZIP_MIN_BYTES = 1024
+_gzipped = OrderedDict()
+_gzipped_lock = threading.Lock()
+
+
+def accepts_gzip(header):
+    for coding in header.split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def gzip_body(body, etag):
+    """Compress a body, remembering the result for bodies with an ETag (static assets, reports)."""
+    if etag is None:
+        return gzip.compress(body, 6, mtime=0)
+    with _gzipped_lock:
+        if etag in _gzipped:
+            _gzipped.move_to_end(etag)
+            return _gzipped[etag]
+    compressed = gzip.compress(body, 6, mtime=0)
+    with _gzipped_lock:
+        _gzipped[etag] = compressed
+        while len(_gzipped) > 32:
+            _gzipped.popitem(last=False)
+    return compressed
+
+
+def compress_middleware(app, req):
+    """gzip text responses for clients that accept it; files streamed with sendfile are left alone."""
+    response = app(req)
+    if (
+        response.status == 200
+        and response.file is None
+        and len(response.body) >= GZIP_MIN_BYTES
+        and response.headers.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES)
+        and "Content-Encoding" not in response.headers
+    ):
+        response.headers["Vary"] = "Accept-Encoding"
+        if accepts_gzip(req.headers.get("Accept-Encoding", "")):
+            response.body = gzip_body(response.body, response.etag)
+            response.headers["Content-Encoding"] = "gzip"
+            if response.etag:
+                response.etag = response.etag[:-1] + '-gzip"'
+    return response
+
+
+def call_route(req):
+    return req.route.handler(req, **req.params)
+
+
+class AuditHandler(SimpleHTTPRequestHandler):
+    # Seconds a client may stall mid-request before its thread is freed
+    timeout = 60
+
+    def parse_request(self):
+        # Start the clock for the trace once the request line has arrived
+        self._started = time.perf_counter()
+        self._ts = time.time()
+        self._status = None
+        self._bytes_in = 0
+        self._bytes_out = 0
+        _disk.ms = 0.0
+        self.root = None
+        self.params = {}
+        self.route_name = None
+        self.body_limit = MAX_BODY
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == "content-length":
+            self._bytes_out += int(value)
+        super().send_header(keyword, value)
+
+    def handle_one_request(self):
+        self._started = None
+        super().handle_one_request()
+        if TRACE is not None and self._started is not None:
+            self._trace()
+
+    def _trace(self):
+        TRACE.write({
+            "ts": round(self._ts, 3),
+            "method": self.command,
+            "path": getattr(self, "path", None),
+            "route": self.route_name,
+            "root": self.root.name if self.root else None,
+            "feature": self.params.get("feature"),
+            "status": self._status,
+            "latency_ms": round((time.perf_counter() - self._started) * 1000, 2),
+            "bytes_in": self._bytes_in,
+            "bytes_out": self._bytes_out,
+            "disk_ms": round(_disk.ms, 2),
+            "pid": os.getpid(),
+        })
+
+    def _dispatch(self):
+        self.url = urlparse(self.path)
+        self._send(PIPELINE(self))
+
+    do_GET = do_HEAD = do_POST = _dispatch
+
+    def _send(self, response):
+        try:
+            self._send_response(response)
+        finally:
+            response.close()
+
+    def _send_response(self, response):
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        if response.etag:
+            self.send_header("ETag", response.etag)
         self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "X-Total-Count, X-Next-Cursor")
+        if response.status != 304:
+            self.send_header("Content-Length", str(response.file[2] if response.file else len(response.body)))
         self.end_headers()
-        self.wfile.write(body)
+        if self.command == "HEAD" or response.status == 304:
+            return
+        if response.file:
+            f, offset, length = response.file
+            self.wfile.flush()
+            # socket.sendfile uses os.sendfile where available and copes with timeouts
+            if self.connection.sendfile(f, offset, length) < length:
+                # The file shrank under us; the client will see a short body
+                self.close_connection = True
+        else:
+            self.wfile.write(response.body)
+
+    # Routes. Each returns a Response; see ROUTER below for the URL table.
+
+    def _get_asset(self, asset):
+        if f"/assets/{asset}" not in ASSETS:
+            raise HTTPError(404, "Not found")
+        content_type, body, etag = ASSETS[f"/assets/{asset}"]
+        return Response(body, 200, content_type, {"Cache-Control": "public, max-age=31536000, immutable"}, etag)
+
+    def _get_service_worker(self):
+        # Fixed URL so the worker can control the whole origin; always revalidated
+        return Response(SW_BODY, 200, "application/javascript; charset=utf-8", {"Cache-Control": "no-cache"}, SW_ETAG)
+
+    def _get_index(self):
+        # The HTML shell; CSS and JS are separate immutable assets
+        return Response(HUB_PAGE, 200, "text/html; charset=utf-8", {"Cache-Control": "no-cache"}, HUB_ETAG)
+
+    def _get_roots(self):
+        return json_response([{"name": r.name, "dir": r.dir} for r in ROOTS.values()])
+
+    def _get_requirements(self):
+        return json_response(REQUIREMENTS.clusters())
+
+    def _get_similar_requirements(self):
+        query = parse_qs(self.url.query)
+        try:
+            limit = min(int(query.get("limit", ["5"])[0]), 50)
+        except ValueError:
+            raise HTTPError(400, "limit must be a number")
+        return json_response(REQUIREMENTS.similar(query.get("q", [""])[0][:1000], limit))
+
+    def _get_stats(self):
+        return json_response({"checklist_cache": CHECKLISTS.stats()})
+
+    def _get_all_audits(self):
+        return self._audit_list_response(list_all_audits())
+
+    def _get_audits(self):
+        return self._audit_list_response(list_audits(self.root))
+
+    def _audit_list_response(self, audits):
+        """The audit list stays a JSON array; paging details travel in headers."""
+        page, total, next_cursor = query_audits(audits, parse_qs(self.url.query))
+        headers = {"X-Total-Count": str(total)}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return json_response(page, headers=headers)
+
+    def _get_blob(self, sha256):
+        """Serve a blob with Range support, immutable caching and zero-copy sendfile."""
+        path = blob_path(self.root, sha256)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            raise HTTPError(404, "Not found")
+        try:
+            byte_range = parse_range(self.headers.get("Range"), size)
+        except HTTPError as e:
+            return Response(b"", e.status, headers={"Content-Range": f"bytes */{size}"})
+        start, end = byte_range or (0, size - 1)
+        content_type = blob_type(path)
+        headers = {"X-Content-Type-Options": "nosniff"}
+        if content_type is None:
+            headers["Content-Disposition"] = "attachment"
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Accept-Ranges"] = "bytes"
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return Response(
+            status=206 if byte_range else 200,
+            content_type=content_type or "application/octet-stream",
+            headers=headers,
+            etag=f'"{sha256}"',
+            file=(open(path, "rb"), start, end - start + 1),
+        )
+
+    def _get_report(self, feature):
+        report = get_report(self.root, feature)
+        if report is None:
+            raise HTTPError(404, "Not found")
+        etag, body = report
+        return Response(body, 200, "text/html; charset=utf-8", {"Cache-Control": "no-cache"}, etag)
+
+    def _get_checklist(self, feature):
+        opened = open_checklist(self.root, feature)
+        if opened is not None:
+            f, size, etag = opened
+            return Response(
+                status=200,
+                content_type="application/json",
+                headers={"Cache-Control": "no-cache"},
+                etag=etag,
+                file=(f, 0, size),
+            )
+        if _signature(self.root.path(f"audit-{feature}.json")) is None:
+            raise HTTPError(404, "Not found")
+        raise HTTPError(500, f"audit-{feature}.json is not a UTF-8 JSON object")
+
+    def _get_results(self, feature):
+        return json_response(get_results(self.root, feature))
+
+    def _get_timing(self, feature):
+        return json_response(self.root.events.timing(feature, get_checklist(self.root, feature)))
+
+    def _get_rounds(self, feature):
+        return json_response(self.root.rounds.list(feature))
+
+    def _get_round(self, feature, n):
+        return json_response(self.root.rounds.state(feature, int(n)))
+
+    def _get_rounds_diff(self, feature):
+        query = parse_qs(self.url.query)
+        try:
+            a = int(query.get("from", ["0"])[0])
+            b = int(query["to"][0]) if "to" in query else None
+        except ValueError:
+            raise HTTPError(400, "from and to must be round numbers")
+        return json_response(self.root.rounds.diff(feature, a, b))
+
+    def _post_results(self, feature):
+        return json_response(save_results(self.root, feature, self.read_json()))
+
+    def _post_events(self, feature):
+        events = self.read_json().get("events")
+        if not isinstance(events, list):
+            raise HTTPError(400, "Expected an events list")
+        return json_response({"accepted": self.root.events.append(feature, events)}, 202)
+
+    def _post_attachment(self, feature, story):
+        fingerprint = checklist_fingerprint(self.root, feature)
+        if fingerprint is None or story not in fingerprint[1]:
+            raise HTTPError(404, "No such feature or story")
+        name = parse_qs(self.url.query).get("name", ["attachment"])[0]
+        chunks = self.iter_body()
+        first = next(chunks, None)
+        if first is None:
+            raise HTTPError(400, "Empty upload")
+        digest, size = store_blob(self.root, itertools.chain([first], chunks))
+        content_type = self.headers.get("Content-Type", "application/octet-stream")
+        attachment = {"sha256": digest, "name": os.path.basename(name)[:200], "type": content_type[:100], "size": size}
+        add_attachment(self.root, feature, story, attachment)
+        # The client also adds this to its copy of results.attachments[story].
+        return json_response(attachment, 201)
+
+    def _lease_request(self, feature):
+        """Parse a lease POST: (payload, tester, ttl, checklist)."""
+        checklist = get_checklist(self.root, feature)
+        if checklist is None:
+            raise HTTPError(404, "Not found")
+        payload = self.read_json()
+        tester = payload.get("tester")
+        if not isinstance(tester, str) or not tester.strip() or len(tester) > 60:
+            raise HTTPError(400, "tester must be a name of up to 60 characters")
+        try:
+            ttl = min(max(int(payload.get("ttl", LEASE_TTL)), 30), MAX_LEASE_TTL)
+        except (TypeError, ValueError):
+            raise HTTPError(400, "ttl must be a number of seconds")
+        return payload, tester.strip(), ttl, checklist
+
+    def _get_leases(self, feature):
+        return json_response(self.root.leases.list(feature))
+
+    def _post_claim(self, feature):
+        payload, tester, ttl, checklist = self._lease_request(feature)
+        sections = checklist.get("sections", [])
+        order = [str(story["id"]) for section in sections for story in section.get("stories", [])]
+        if "next" in payload:
+            try:
+                count = min(max(int(payload["next"]), 1), MAX_LEASE_BATCH)
+            except (TypeError, ValueError):
+                raise HTTPError(400, "next must be a number of stories")
+            data = get_results(self.root, feature)
+            retest = set(data.get("retest") or [])
+            done = {story for story in data.get("results") or {} if story not in retest}
+            return json_response(self.root.leases.claim_next(feature, tester, order, done, count, ttl))
+        if "section" in payload:
+            section = next((s for s in sections if s.get("title") == payload["section"]), None)
+            if section is None:
+                raise HTTPError(400, "Unknown section")
+            stories = [str(story["id"]) for story in section.get("stories", [])]
+        else:
+            stories = payload.get("stories")
+            if not isinstance(stories, list) or not stories:
+                raise HTTPError(400, "Expected stories, section or next")
+            stories = [str(story) for story in stories[:MAX_LEASE_BATCH]]
+            unknown = [story for story in stories if story not in order]
+            if unknown:
+                raise HTTPError(400, f"Unknown stories: {', '.join(unknown[:10])}")
+        return json_response(self.root.leases.claim(feature, tester, stories, ttl))
+
+    def _post_heartbeat(self, feature):
+        _, tester, ttl, _ = self._lease_request(feature)
+        return json_response(self.root.leases.heartbeat(feature, tester, ttl))
+
+    def _post_release(self, feature):
+        payload, tester, _, _ = self._lease_request(feature)
+        stories = payload.get("stories")
+        if stories is not None and not isinstance(stories, list):
+            raise HTTPError(400, "stories must be a list")
+        stories = None if stories is None else {str(story) for story in stories}
+        return json_response(self.root.leases.release(feature, tester, stories))
+
+    def _post_round(self, feature):
+        payload = self.read_json()
+        data = get_results(self.root, feature)
+        return json_response(self.root.rounds.close(feature, data, payload.get("label")), 201)
+
+    def iter_body(self, limit=None):
+        """Yield the request body in chunks of at most BODY_CHUNK bytes.
+
+        Handles both Content-Length and chunked transfer encoding, and raises
+        HTTPError(413) as soon as the body is known to exceed limit (by
+        default the route's body limit).
+        """
+        if limit is None:
+            limit = self.body_limit
+        try:
+            if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+                yield from self._iter_chunked(limit)
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                raise HTTPError(400, "Invalid Content-Length")
+            if length < 0:
+                raise HTTPError(400, "Invalid Content-Length")
+            if length > limit:
+                raise HTTPError(413, f"Request body exceeds {limit} bytes")
+            while length:
+                chunk = self.rfile.read(min(length, BODY_CHUNK))
+                if not chunk:
+                    raise HTTPError(400, "Truncated request body")
+                length -= len(chunk)
+                self._bytes_in += len(chunk)
+                yield chunk
+        except TimeoutError:
+            self.close_connection = True
+            raise HTTPError(408, "Timed out reading request body")
+        except HTTPError:
+            # The rest of the body is still unread, so the connection can't be reused
+            self.close_connection = True
+            raise
+
+    def _iter_chunked(self, limit):
+        total = 0
+        while True:
+            line = self.rfile.readline(1024)
+            try:
+                size = int(line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise HTTPError(400, "Invalid chunk size")
+            if size == 0:
+                # Discard any trailers up to the terminating blank line
+                while self.rfile.readline(1024).strip():
+                    pass
+                return
+            total += size
+            if total > limit:
+                raise HTTPError(413, f"Request body exceeds {limit} bytes")
+            while size:
+                chunk = self.rfile.read(min(size, BODY_CHUNK))
+                if not chunk:
+                    raise HTTPError(400, "Truncated request body")
+                size -= len(chunk)
+                self._bytes_in += len(chunk)
+                yield chunk
+            self.rfile.readline(1024)  # CRLF closing the chunk
+
+    def read_json(self, limit=None):
+        """Read and parse a JSON object body, never buffering more than limit bytes."""
+        body = bytearray()
+        for chunk in self.iter_body(limit):
+            body += chunk
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Invalid JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Expected a JSON object")
+        return payload
 
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Methods", "GET, HEAD, POST, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
         self.end_headers()
 
@@ -176,582 +2302,910 @@ class AuditHandler(SimpleHTTPRequestHandler):
             super().log_message(format, *args)
 
 
-HUB_HTML = r"""<!DOCTYPE html>
+ROUTER = Router([
+    Route("GET", "/assets/{asset}", AuditHandler._get_asset, scope="global"),
+    Route("GET", "/sw.js", AuditHandler._get_service_worker, scope="global"),
+    # Combined views across all projects
+    Route("GET", "/api/roots", AuditHandler._get_roots, scope="global"),
+    Route("GET", "/api/requirements", AuditHandler._get_requirements, scope="global"),
+    Route("GET", "/api/requirements/similar", AuditHandler._get_similar_requirements, scope="global"),
+    Route("GET", "/api/stats", AuditHandler._get_stats, scope="global"),
+    Route("GET", "/api/audits", AuditHandler._get_all_audits, scope="global"),
+    # Per project: under /r/<name>/, or unprefixed for the first project
+    Route("GET", "", AuditHandler._get_index),
+    Route("GET", "/index.html", AuditHandler._get_index),
+    Route("GET", "/api/audits", AuditHandler._get_audits),
+    Route("GET", "/blobs/{sha256}", AuditHandler._get_blob),
+    Route("GET", "/report/{feature}", AuditHandler._get_report),
+    Route("GET", "/api/audits/{feature}/checklist", AuditHandler._get_checklist),
+    Route("GET", "/api/audits/{feature}/results", AuditHandler._get_results),
+    Route("GET", "/api/audits/{feature}/timing", AuditHandler._get_timing),
+    Route("GET", "/api/audits/{feature}/rounds", AuditHandler._get_rounds),
+    Route("GET", "/api/audits/{feature}/rounds/diff", AuditHandler._get_rounds_diff),
+    Route("GET", "/api/audits/{feature}/rounds/{n}", AuditHandler._get_round),
+    Route("GET", "/api/audits/{feature}/leases", AuditHandler._get_leases),
+    Route("POST", "/api/audits/{feature}/results", AuditHandler._post_results),
+    Route("POST", "/api/audits/{feature}/events", AuditHandler._post_events),
+    Route("POST", "/api/audits/{feature}/stories/{story}/attachments", AuditHandler._post_attachment, MAX_UPLOAD),
+    Route("POST", "/api/audits/{feature}/rounds", AuditHandler._post_round),
+    Route("POST", "/api/audits/{feature}/leases", AuditHandler._post_claim),
+    Route("POST", "/api/audits/{feature}/leases/heartbeat", AuditHandler._post_heartbeat),
+    Route("POST", "/api/audits/{feature}/leases/release", AuditHandler._post_release),
+])
+
+# Outermost first: errors wrap everything, so routing and body limits can simply raise.
+PIPELINE = build_pipeline(
+    [
+        error_middleware,
+        timing_middleware,
+        routing_middleware,
+        body_limit_middleware,
+        conditional_get_middleware,
+        compress_middleware,
+    ],
+    call_route,
+)
+
+
+HUB_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
 <title>Audit Hub</title>
-<style>
-  @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-
-  * { margin: 0; padding: 0; box-sizing: border-box; }
-
-  body {
-    font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-    background: #fff;
-    color: #37352f;
-    line-height: 1.6;
-    -webkit-font-smoothing: antialiased;
-    display: flex;
-    height: 100vh;
-    overflow: hidden;
-  }
+<link rel="stylesheet" href="{css_url}">
+<script src="{js_url}" defer></script>
+</head>
+<body>
 
-  /* Sidebar */
-  .sidebar {
-    width: 280px;
-    min-width: 280px;
-    border-right: 1px solid #e8e7e4;
-    background: #fbfbfa;
-    display: flex;
-    flex-direction: column;
-    overflow: hidden;
-  }
+<div class="sidebar">
+  <div class="sidebar-header">
+    <div class="sidebar-title">Audits</div>
+    <div class="sidebar-filters">
+      <input type="search" class="sidebar-search" id="audit-filter" placeholder="Filter audits..." oninput="onFilterChange()">
+      <div class="sidebar-selects">
+        <select id="audit-status" onchange="loadAuditList()">
+          <option value="">All</option>
+          <option value="open">Open</option>
+          <option value="has-fails">Has fails</option>
+          <option value="complete">Complete</option>
+        </select>
+        <select id="audit-sort" onchange="loadAuditList()">
+          <option value="feature">Name</option>
+          <option value="-date">Newest</option>
+          <option value="date">Oldest</option>
+          <option value="-fails">Most fails</option>
+          <option value="progress">Least done</option>
+        </select>
+      </div>
+    </div>
+  </div>
+  <div class="sidebar-list" id="sidebar-list">
+    <div class="sidebar-empty">Loading...</div>
+  </div>
+</div>
 
-  .sidebar-header {
-    padding: 20px 16px 12px;
-    border-bottom: 1px solid #e8e7e4;
-  }
+<div class="main" id="main">
+  <div class="main-empty">Select an audit from the sidebar</div>
+</div>
 
-  .sidebar-title {
-    font-size: 14px;
-    font-weight: 600;
-    color: #9b9a97;
-    text-transform: uppercase;
-    letter-spacing: 0.05em;
-  }
+<div class="saved-indicator" id="saved-indicator">Saved</div>
 
-  .sidebar-list {
-    flex: 1;
-    overflow-y: auto;
-    padding: 8px;
-  }
+</body>
+</html>"""
 
-  .sidebar-item {
-    padding: 10px 12px;
-    border-radius: 6px;
-    cursor: pointer;
-    margin-bottom: 2px;
-    transition: background 0.1s;
-  }
-  .sidebar-item:hover { background: #f1f1ef; }
-  .sidebar-item.active { background: #e8e7e4; }
+HUB_CSS = r"""* { margin: 0; padding: 0; box-sizing: border-box; }
+
+body {
+  font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+  background: #fff;
+  color: #37352f;
+  line-height: 1.6;
+  -webkit-font-smoothing: antialiased;
+  display: flex;
+  height: 100vh;
+  overflow: hidden;
+}
 
-  .sidebar-item-title {
-    font-size: 14px;
-    font-weight: 500;
-    margin-bottom: 6px;
-  }
+/* Sidebar */
+.sidebar {
+  width: 280px;
+  min-width: 280px;
+  border-right: 1px solid #e8e7e4;
+  background: #fbfbfa;
+  display: flex;
+  flex-direction: column;
+  overflow: hidden;
+}
 
-  .sidebar-progress {
-    display: flex;
-    align-items: center;
-    gap: 8px;
-  }
+.sidebar-header {
+  padding: 20px 16px 12px;
+  border-bottom: 1px solid #e8e7e4;
+}
 
-  .sidebar-progress-bar {
-    flex: 1;
-    height: 4px;
-    background: #e0dfdc;
-    border-radius: 2px;
-    overflow: hidden;
-  }
+.sidebar-title {
+  font-size: 14px;
+  font-weight: 600;
+  color: #9b9a97;
+  text-transform: uppercase;
+  letter-spacing: 0.05em;
+}
 
-  .sidebar-progress-fill-pass {
-    height: 100%;
-    background: #4daa57;
-    float: left;
-    transition: width 0.3s ease;
-  }
-  .sidebar-progress-fill-fail {
-    height: 100%;
-    background: #e03e3e;
-    float: left;
-    transition: width 0.3s ease;
-  }
+.sidebar-filters {
+  margin-top: 10px;
+  display: flex;
+  flex-direction: column;
+  gap: 6px;
+}
+.sidebar-search, .sidebar-selects select {
+  padding: 4px 8px;
+  border: 1px solid #e0dfdc;
+  border-radius: 4px;
+  background: white;
+  font-size: 13px;
+  font-family: inherit;
+  color: inherit;
+}
+.sidebar-search:focus { outline: none; border-color: #2eaadc; }
+.sidebar-selects {
+  display: flex;
+  gap: 6px;
+}
+.sidebar-selects select { flex: 1; min-width: 0; }
 
-  .sidebar-stats {
-    font-size: 11px;
-    color: #9b9a97;
-    white-space: nowrap;
-  }
+.sidebar-list {
+  flex: 1;
+  overflow-y: auto;
+  padding: 8px;
+}
 
-  .sidebar-empty {
-    padding: 24px 16px;
-    font-size: 14px;
-    color: #9b9a97;
-    text-align: center;
-  }
+.sidebar-group {
+  padding: 12px 12px 4px;
+  font-size: 11px;
+  font-weight: 600;
+  color: #9b9a97;
+  text-transform: uppercase;
+  letter-spacing: 0.05em;
+}
+.sidebar-group:first-child { padding-top: 4px; }
+
+.sidebar-item {
+  padding: 10px 12px;
+  border-radius: 6px;
+  cursor: pointer;
+  margin-bottom: 2px;
+  transition: background 0.1s;
+}
+.sidebar-item:hover { background: #f1f1ef; }
+.sidebar-item.active { background: #e8e7e4; }
 
-  /* Main */
-  .main {
-    flex: 1;
-    overflow-y: auto;
-    position: relative;
-  }
+.sidebar-item-title {
+  font-size: 14px;
+  font-weight: 500;
+  margin-bottom: 6px;
+}
 
-  .main-empty {
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    height: 100%;
-    color: #9b9a97;
-    font-size: 16px;
-  }
+.sidebar-progress {
+  display: flex;
+  align-items: center;
+  gap: 8px;
+}
 
-  .page {
-    max-width: 900px;
-    margin: 0 auto;
-    padding: 48px 64px 120px;
-  }
+.sidebar-progress-bar {
+  flex: 1;
+  height: 4px;
+  background: #e0dfdc;
+  border-radius: 2px;
+  overflow: hidden;
+}
 
-  h1 {
-    font-size: 36px;
-    font-weight: 700;
-    letter-spacing: -0.02em;
-    margin-bottom: 4px;
-    line-height: 1.2;
-  }
+.sidebar-progress-fill-pass {
+  height: 100%;
+  background: #4daa57;
+  float: left;
+  transition: width 0.3s ease;
+}
+.sidebar-progress-fill-fail {
+  height: 100%;
+  background: #e03e3e;
+  float: left;
+  transition: width 0.3s ease;
+}
 
-  .meta {
-    font-size: 14px;
-    color: #9b9a97;
-    margin-bottom: 24px;
-  }
+.sidebar-stats {
+  font-size: 11px;
+  color: #9b9a97;
+  white-space: nowrap;
+}
 
-  /* Progress */
-  .progress-bar-container { margin-bottom: 32px; }
-  .progress-label {
-    font-size: 14px;
-    color: #9b9a97;
-    margin-bottom: 6px;
-    display: flex;
-    justify-content: space-between;
-  }
-  .progress-bar {
-    height: 6px;
-    background: #e8e7e4;
-    border-radius: 3px;
-    overflow: hidden;
-    display: flex;
-  }
-  .progress-fill-pass {
-    height: 100%;
-    background: #4daa57;
-    transition: width 0.3s ease;
-  }
-  .progress-fill-fail {
-    height: 100%;
-    background: #e03e3e;
-    transition: width 0.3s ease;
-  }
+.sidebar-empty {
+  padding: 24px 16px;
+  font-size: 14px;
+  color: #9b9a97;
+  text-align: center;
+}
 
-  /* Sections */
-  .section { margin-bottom: 8px; }
-
-  .section-header {
-    display: flex;
-    align-items: center;
-    gap: 6px;
-    padding: 6px 4px;
-    cursor: pointer;
-    user-select: none;
-    border-radius: 4px;
-  }
-  .section-header:hover { background: #f1f1ef; }
-
-  .section-toggle {
-    width: 20px;
-    height: 20px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    color: #9b9a97;
-    transition: transform 0.15s ease;
-    flex-shrink: 0;
-  }
-  .section-toggle.open { transform: rotate(90deg); }
+/* Main */
+.main {
+  flex: 1;
+  overflow-y: auto;
+  position: relative;
+}
 
-  .section-title {
-    font-size: 20px;
-    font-weight: 600;
-    letter-spacing: -0.01em;
-  }
+.main-empty {
+  display: flex;
+  align-items: center;
+  justify-content: center;
+  height: 100%;
+  color: #9b9a97;
+  font-size: 16px;
+}
 
-  .section-count {
-    font-size: 13px;
-    color: #9b9a97;
-    margin-left: 8px;
-  }
+.page {
+  max-width: 900px;
+  margin: 0 auto;
+  padding: 48px 64px 120px;
+}
 
-  .section-body {
-    padding-left: 26px;
-    display: none;
-  }
-  .section-body.open { display: block; }
-
-  /* Stories */
-  .story {
-    display: flex;
-    align-items: flex-start;
-    gap: 8px;
-    padding: 8px 4px;
-    border-radius: 4px;
-    margin-bottom: 2px;
-  }
-  .story:hover { background: #f7f6f3; }
-
-  .story-checkbox {
-    width: 18px;
-    height: 18px;
-    border: 2px solid #c4c4c0;
-    border-radius: 3px;
-    flex-shrink: 0;
-    margin-top: 3px;
-    cursor: pointer;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    transition: all 0.15s ease;
-  }
-  .story-checkbox.checked {
-    background: #2eaadc;
-    border-color: #2eaadc;
-  }
-  .story-checkbox.checked::after {
-    content: '\2713';
-    color: white;
-    font-size: 12px;
-    font-weight: 700;
-  }
-  .story-checkbox.fail {
-    background: #e03e3e;
-    border-color: #e03e3e;
-  }
-  .story-checkbox.fail::after {
-    content: '\2715';
-    color: white;
-    font-size: 12px;
-    font-weight: 700;
-  }
-  .story-checkbox.skip {
-    background: #9b9a97;
-    border-color: #9b9a97;
-  }
-  .story-checkbox.skip::after {
-    content: '\2014';
-    color: white;
-    font-size: 12px;
-    font-weight: 700;
-  }
+h1 {
+  font-size: 36px;
+  font-weight: 700;
+  letter-spacing: -0.02em;
+  margin-bottom: 4px;
+  line-height: 1.2;
+}
+
+.meta {
+  font-size: 14px;
+  color: #9b9a97;
+  margin-bottom: 24px;
+}
+
+/* Progress */
+.progress-bar-container { margin-bottom: 32px; }
+.progress-label {
+  font-size: 14px;
+  color: #9b9a97;
+  margin-bottom: 6px;
+  display: flex;
+  justify-content: space-between;
+}
+.progress-bar {
+  height: 6px;
+  background: #e8e7e4;
+  border-radius: 3px;
+  overflow: hidden;
+  display: flex;
+}
+.progress-fill-pass {
+  height: 100%;
+  background: #4daa57;
+  transition: width 0.3s ease;
+}
+.progress-fill-fail {
+  height: 100%;
+  background: #e03e3e;
+  transition: width 0.3s ease;
+}
+
+/* Sections */
+.section { margin-bottom: 8px; }
+
+.section-header {
+  display: flex;
+  align-items: center;
+  gap: 6px;
+  padding: 6px 4px;
+  cursor: pointer;
+  user-select: none;
+  border-radius: 4px;
+}
+.section-header:hover { background: #f1f1ef; }
+
+.section-toggle {
+  width: 20px;
+  height: 20px;
+  display: flex;
+  align-items: center;
+  justify-content: center;
+  color: #9b9a97;
+  transition: transform 0.15s ease;
+  flex-shrink: 0;
+}
+.section-toggle.open { transform: rotate(90deg); }
+
+.section-title {
+  font-size: 20px;
+  font-weight: 600;
+  letter-spacing: -0.01em;
+}
+
+.section-count {
+  font-size: 13px;
+  color: #9b9a97;
+  margin-left: 8px;
+}
+.claim-section-btn {
+  margin-left: auto;
+  padding: 1px 8px;
+  border-radius: 4px;
+  font-size: 12px;
+  color: #9b9a97;
+  cursor: pointer;
+  border: 1px solid #e0dfdc;
+  background: white;
+}
+.claim-section-btn:hover { color: #37352f; }
+@media (hover: hover) {
+  .claim-section-btn { opacity: 0; }
+  .section-header:hover .claim-section-btn { opacity: 1; }
+}
+
+/* Claiming stories */
+.claim-bar {
+  display: flex;
+  align-items: center;
+  flex-wrap: wrap;
+  gap: 8px;
+  margin: -16px 0 32px;
+}
+.tester-input {
+  width: 160px;
+  padding: 5px 10px;
+  border: 1px solid #e0dfdc;
+  border-radius: 4px;
+  font-size: 13px;
+  font-family: inherit;
+}
+.tester-input:focus { outline: none; border-color: #2eaadc; }
+.claim-btn {
+  padding: 5px 12px;
+  border-radius: 4px;
+  font-size: 13px;
+  font-weight: 500;
+  cursor: pointer;
+  border: 1px solid #e0dfdc;
+  background: white;
+}
+.claim-btn:hover { background: #f7f6f3; }
+.lease-status {
+  font-size: 13px;
+  color: #9b9a97;
+}
 
-  .story-content { flex: 1; min-width: 0; }
+.section-body {
+  padding-left: 26px;
+  display: none;
+}
+.section-body.open { display: block; }
+
+/* Stories */
+.story {
+  display: flex;
+  align-items: flex-start;
+  gap: 8px;
+  padding: 8px 4px;
+  border-radius: 4px;
+  margin-bottom: 2px;
+}
+.story:hover { background: #f7f6f3; }
+
+.story-checkbox {
+  width: 18px;
+  height: 18px;
+  border: 2px solid #c4c4c0;
+  border-radius: 3px;
+  flex-shrink: 0;
+  margin-top: 3px;
+  cursor: pointer;
+  display: flex;
+  align-items: center;
+  justify-content: center;
+  transition: all 0.15s ease;
+}
+.story-checkbox.checked {
+  background: #2eaadc;
+  border-color: #2eaadc;
+}
+.story-checkbox.checked::after {
+  content: '\2713';
+  color: white;
+  font-size: 12px;
+  font-weight: 700;
+}
+.story-checkbox.fail {
+  background: #e03e3e;
+  border-color: #e03e3e;
+}
+.story-checkbox.fail::after {
+  content: '\2715';
+  color: white;
+  font-size: 12px;
+  font-weight: 700;
+}
+.story-checkbox.skip {
+  background: #9b9a97;
+  border-color: #9b9a97;
+}
+.story-checkbox.skip::after {
+  content: '\2014';
+  color: white;
+  font-size: 12px;
+  font-weight: 700;
+}
 
-  .story-title {
-    font-size: 15px;
-    font-weight: 500;
-    cursor: pointer;
-  }
-  .story.checked .story-title {
-    color: #9b9a97;
-    text-decoration: line-through;
-  }
-  .story.skipped .story-title {
-    color: #9b9a97;
-  }
+.story-content { flex: 1; min-width: 0; }
 
-  /* Story detail */
-  .story-detail {
-    display: none;
-    margin-top: 8px;
-    padding: 12px 16px;
-    background: #fbfbfa;
-    border-radius: 4px;
-    border-left: 3px solid #e8e7e4;
-  }
-  .story-detail.open { display: block; }
-
-  .detail-section { margin-bottom: 10px; }
-  .detail-section:last-child { margin-bottom: 0; }
-
-  .detail-label {
-    font-size: 12px;
-    font-weight: 600;
-    text-transform: uppercase;
-    letter-spacing: 0.05em;
-    color: #9b9a97;
-    margin-bottom: 4px;
-  }
+.story-title {
+  font-size: 15px;
+  font-weight: 500;
+  cursor: pointer;
+}
+.story.checked .story-title {
+  color: #9b9a97;
+  text-decoration: line-through;
+}
+.story.skipped .story-title {
+  color: #9b9a97;
+}
 
-  .step {
-    display: flex;
-    align-items: flex-start;
-    gap: 6px;
-    padding: 3px 0;
-    font-size: 14px;
-  }
-  .step-number {
-    color: #9b9a97;
-    font-size: 13px;
-    min-width: 20px;
-    text-align: right;
-    flex-shrink: 0;
-  }
-  .step-text { color: #37352f; }
-
-  .expected {
-    font-size: 14px;
-    color: #37352f;
-    padding: 8px 12px;
-    background: #edf8e9;
-    border-radius: 4px;
-    border-left: 3px solid #4daa57;
-  }
+.retest-badge {
+  display: inline-block;
+  margin-left: 8px;
+  padding: 0 6px;
+  border-radius: 3px;
+  background: #fbf3db;
+  color: #9a7800;
+  font-size: 11px;
+  font-weight: 600;
+  vertical-align: middle;
+  text-decoration: none;
+}
 
-  /* Result buttons */
-  .result-buttons {
-    display: flex;
-    gap: 8px;
-    margin-top: 10px;
-  }
-  .result-btn {
-    padding: 4px 14px;
-    border-radius: 4px;
-    font-size: 13px;
-    font-weight: 500;
-    cursor: pointer;
-    border: 1px solid #e0dfdc;
-    background: white;
-    transition: all 0.15s ease;
-  }
-  .result-btn:hover { background: #f7f6f3; }
-  .result-btn.pass-btn.active {
-    background: #dbf3d8;
-    border-color: #4daa57;
-    color: #2a7e33;
-  }
-  .result-btn.fail-btn.active {
-    background: #fde8e8;
-    border-color: #e03e3e;
-    color: #c43333;
-  }
-  .result-btn.skip-btn.active {
-    background: #f5f0e3;
-    border-color: #dfab01;
-    color: #9a7800;
-  }
+.lease-badge {
+  display: inline-block;
+  margin-left: 8px;
+  padding: 0 6px;
+  border-radius: 3px;
+  background: #e7f3f8;
+  color: #1f7ba0;
+  font-size: 11px;
+  font-weight: 600;
+  vertical-align: middle;
+}
+.lease-badge.mine {
+  background: #edf8e9;
+  color: #2a7e33;
+}
+.lease-badge:empty { display: none; }
+
+/* Story detail */
+.story-detail {
+  display: none;
+  margin-top: 8px;
+  padding: 12px 16px;
+  background: #fbfbfa;
+  border-radius: 4px;
+  border-left: 3px solid #e8e7e4;
+}
+.story-detail.open { display: block; }
+
+.detail-section { margin-bottom: 10px; }
+.detail-section:last-child { margin-bottom: 0; }
+
+.detail-label {
+  font-size: 12px;
+  font-weight: 600;
+  text-transform: uppercase;
+  letter-spacing: 0.05em;
+  color: #9b9a97;
+  margin-bottom: 4px;
+}
 
-  .notes-input {
-    width: 100%;
-    margin-top: 8px;
-    padding: 8px 12px;
-    border: 1px solid #e0dfdc;
-    border-radius: 4px;
-    font-size: 14px;
-    font-family: inherit;
-    resize: vertical;
-    min-height: 36px;
-  }
-  .notes-input:focus { outline: none; border-color: #2eaadc; }
-  .notes-input::placeholder { color: #c4c4c0; }
-
-  /* New requirements */
-  .new-requirements {
-    margin-top: 40px;
-    padding-top: 24px;
-    border-top: 1px solid #e8e7e4;
-  }
-  .new-req-title {
-    font-size: 20px;
-    font-weight: 600;
-    letter-spacing: -0.01em;
-    margin-bottom: 4px;
-  }
-  .new-req-subtitle {
-    font-size: 13px;
-    color: #9b9a97;
-    margin-bottom: 16px;
-  }
-  .new-req-input-row {
-    display: flex;
-    gap: 8px;
-    margin-bottom: 16px;
-  }
-  .new-req-input {
-    flex: 1;
-    padding: 8px 12px;
-    border: 1px solid #e0dfdc;
-    border-radius: 4px;
-    font-size: 14px;
-    font-family: inherit;
-  }
-  .new-req-input:focus { outline: none; border-color: #2eaadc; }
-  .new-req-input::placeholder { color: #c4c4c0; }
-  .new-req-add-btn {
-    padding: 8px 16px;
-    border-radius: 4px;
-    font-size: 14px;
-    font-weight: 500;
-    cursor: pointer;
-    border: 1px solid #2eaadc;
-    background: #2eaadc;
-    color: white;
-  }
-  .new-req-add-btn:hover { opacity: 0.9; }
-  .new-req-item {
-    display: flex;
-    align-items: flex-start;
-    gap: 8px;
-    padding: 8px 4px;
-    border-radius: 4px;
-  }
-  .new-req-item:hover { background: #f7f6f3; }
-  .new-req-text {
-    flex: 1;
-    font-size: 14px;
-    line-height: 1.5;
-  }
-  .new-req-remove {
-    width: 20px;
-    height: 20px;
-    border: none;
-    background: none;
-    color: #9b9a97;
-    cursor: pointer;
-    font-size: 16px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    border-radius: 3px;
-    flex-shrink: 0;
-  }
-  .new-req-remove:hover { background: #fde8e8; color: #e03e3e; }
-
-  /* Summary bar */
-  .summary-bar {
-    position: fixed;
-    bottom: 0;
-    right: 0;
-    left: 280px;
-    background: white;
-    border-top: 1px solid #e8e7e4;
-    padding: 12px 32px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    gap: 24px;
-    font-size: 14px;
-    z-index: 100;
-  }
-  .summary-stat {
-    display: flex;
-    align-items: center;
-    gap: 6px;
-  }
-  .dot {
-    width: 10px;
-    height: 10px;
-    border-radius: 50%;
-  }
-  .dot.pass { background: #4daa57; }
-  .dot.fail { background: #e03e3e; }
-  .dot.skip { background: #dfab01; }
-  .dot.pending { background: #e0dfdc; }
-
-  .export-btn {
-    padding: 6px 14px;
-    border-radius: 4px;
-    font-size: 13px;
-    font-weight: 500;
-    cursor: pointer;
-    border: 1px solid #e0dfdc;
-    background: white;
-    margin-left: 16px;
-  }
-  .export-btn:hover { background: #f7f6f3; }
-
-  /* Saved indicator */
-  .saved-indicator {
-    position: fixed;
-    top: 16px;
-    right: 16px;
-    padding: 8px 16px;
-    background: #dbf3d8;
-    color: #2a7e33;
-    border-radius: 6px;
-    font-size: 13px;
-    font-weight: 500;
-    opacity: 0;
-    transition: opacity 0.3s ease;
-    z-index: 200;
-    pointer-events: none;
-  }
-  .saved-indicator.show { opacity: 1; }
-</style>
-</head>
-<body>
+.step {
+  display: flex;
+  align-items: flex-start;
+  gap: 6px;
+  padding: 3px 0;
+  font-size: 14px;
+}
+.step-number {
+  color: #9b9a97;
+  font-size: 13px;
+  min-width: 20px;
+  text-align: right;
+  flex-shrink: 0;
+}
+.step-text { color: #37352f; }
+
+.expected {
+  font-size: 14px;
+  color: #37352f;
+  padding: 8px 12px;
+  background: #edf8e9;
+  border-radius: 4px;
+  border-left: 3px solid #4daa57;
+}
 
-<div class="sidebar">
-  <div class="sidebar-header">
-    <div class="sidebar-title">Audits</div>
-  </div>
-  <div class="sidebar-list" id="sidebar-list">
-    <div class="sidebar-empty">Loading...</div>
-  </div>
-</div>
+/* Result buttons */
+.result-buttons {
+  display: flex;
+  gap: 8px;
+  margin-top: 10px;
+}
+.result-btn {
+  padding: 4px 14px;
+  border-radius: 4px;
+  font-size: 13px;
+  font-weight: 500;
+  cursor: pointer;
+  border: 1px solid #e0dfdc;
+  background: white;
+  transition: all 0.15s ease;
+}
+.result-btn:hover { background: #f7f6f3; }
+.result-btn.pass-btn.active {
+  background: #dbf3d8;
+  border-color: #4daa57;
+  color: #2a7e33;
+}
+.result-btn.fail-btn.active {
+  background: #fde8e8;
+  border-color: #e03e3e;
+  color: #c43333;
+}
+.result-btn.skip-btn.active {
+  background: #f5f0e3;
+  border-color: #dfab01;
+  color: #9a7800;
+}
 
-<div class="main" id="main">
-  <div class="main-empty">Select an audit from the sidebar</div>
-</div>
+.notes-input {
+  width: 100%;
+  margin-top: 8px;
+  padding: 8px 12px;
+  border: 1px solid #e0dfdc;
+  border-radius: 4px;
+  font-size: 14px;
+  font-family: inherit;
+  resize: vertical;
+  min-height: 36px;
+}
+.notes-input:focus { outline: none; border-color: #2eaadc; }
+.notes-input::placeholder { color: #c4c4c0; }
+
+/* Attachments */
+.attachments {
+  display: flex;
+  flex-wrap: wrap;
+  gap: 8px;
+  margin-top: 8px;
+}
+.attachment {
+  position: relative;
+  border: 1px solid #e0dfdc;
+  border-radius: 4px;
+  background: white;
+  font-size: 12px;
+  overflow: hidden;
+}
+.attachment img {
+  display: block;
+  width: 120px;
+  height: 80px;
+  object-fit: cover;
+}
+.attachment-file {
+  display: block;
+  padding: 8px 28px 8px 10px;
+  max-width: 200px;
+  color: #37352f;
+  text-decoration: none;
+  white-space: nowrap;
+  overflow: hidden;
+  text-overflow: ellipsis;
+}
+.attachment-remove {
+  position: absolute;
+  top: 2px;
+  right: 2px;
+  width: 20px;
+  height: 20px;
+  border: none;
+  border-radius: 3px;
+  background: rgba(255, 255, 255, 0.85);
+  color: #9b9a97;
+  cursor: pointer;
+}
+.attachment-remove:hover { background: #fde8e8; color: #e03e3e; }
+.attach-btn {
+  display: inline-block;
+  margin-top: 8px;
+  font-size: 13px;
+  color: #9b9a97;
+  cursor: pointer;
+}
+.attach-btn:hover { color: #2eaadc; }
+.attach-btn input { display: none; }
+
+/* New requirements */
+.new-requirements {
+  margin-top: 40px;
+  padding-top: 24px;
+  border-top: 1px solid #e8e7e4;
+}
+.new-req-title {
+  font-size: 20px;
+  font-weight: 600;
+  letter-spacing: -0.01em;
+  margin-bottom: 4px;
+}
+.new-req-subtitle {
+  font-size: 13px;
+  color: #9b9a97;
+  margin-bottom: 16px;
+}
+.new-req-input-row {
+  display: flex;
+  gap: 8px;
+  margin-bottom: 16px;
+}
+.new-req-input {
+  flex: 1;
+  padding: 8px 12px;
+  border: 1px solid #e0dfdc;
+  border-radius: 4px;
+  font-size: 14px;
+  font-family: inherit;
+}
+.new-req-input:focus { outline: none; border-color: #2eaadc; }
+.new-req-input::placeholder { color: #c4c4c0; }
+.new-req-add-btn {
+  padding: 8px 16px;
+  border-radius: 4px;
+  font-size: 14px;
+  font-weight: 500;
+  cursor: pointer;
+  border: 1px solid #2eaadc;
+  background: #2eaadc;
+  color: white;
+}
+.new-req-add-btn:hover { opacity: 0.9; }
+.new-req-similar {
+  margin: -8px 0 16px;
+  font-size: 13px;
+  color: #9b9a97;
+}
+.new-req-similar:empty { display: none; }
+.new-req-similar-item {
+  padding: 2px 0;
+  cursor: pointer;
+}
+.new-req-similar-item:hover { color: #37352f; }
+.new-req-similar-source { font-size: 11px; margin-left: 6px; }
+.new-req-item {
+  display: flex;
+  align-items: flex-start;
+  gap: 8px;
+  padding: 8px 4px;
+  border-radius: 4px;
+}
+.new-req-item:hover { background: #f7f6f3; }
+.new-req-text {
+  flex: 1;
+  font-size: 14px;
+  line-height: 1.5;
+}
+.new-req-remove {
+  width: 20px;
+  height: 20px;
+  border: none;
+  background: none;
+  color: #9b9a97;
+  cursor: pointer;
+  font-size: 16px;
+  display: flex;
+  align-items: center;
+  justify-content: center;
+  border-radius: 3px;
+  flex-shrink: 0;
+}
+.new-req-remove:hover { background: #fde8e8; color: #e03e3e; }
 
-<div class="saved-indicator" id="saved-indicator">Saved</div>
+/* Timing */
+.timing {
+  margin-top: 40px;
+  padding-top: 24px;
+  border-top: 1px solid #e8e7e4;
+}
+.timing-load { margin-left: 0; }
+.timing-table {
+  width: 100%;
+  border-collapse: collapse;
+  font-size: 13px;
+  margin-bottom: 16px;
+}
+.timing-table th {
+  text-align: left;
+  font-weight: 600;
+  color: #9b9a97;
+  border-bottom: 1px solid #e8e7e4;
+  padding: 4px 8px 4px 0;
+}
+.timing-table td {
+  padding: 4px 8px 4px 0;
+  border-bottom: 1px solid #f1f1ef;
+}
+
+/* Summary bar */
+.summary-bar {
+  position: fixed;
+  bottom: 0;
+  right: 0;
+  left: 280px;
+  background: white;
+  border-top: 1px solid #e8e7e4;
+  padding: 12px 32px;
+  display: flex;
+  align-items: center;
+  justify-content: center;
+  gap: 24px;
+  font-size: 14px;
+  z-index: 100;
+}
+.summary-stat {
+  display: flex;
+  align-items: center;
+  gap: 6px;
+}
+.dot {
+  width: 10px;
+  height: 10px;
+  border-radius: 50%;
+}
+.dot.pass { background: #4daa57; }
+.dot.fail { background: #e03e3e; }
+.dot.skip { background: #dfab01; }
+.dot.pending { background: #e0dfdc; }
+
+.export-btn {
+  padding: 6px 14px;
+  border-radius: 4px;
+  font-size: 13px;
+  font-weight: 500;
+  cursor: pointer;
+  border: 1px solid #e0dfdc;
+  background: white;
+  margin-left: 16px;
+}
+.export-btn:hover { background: #f7f6f3; }
+a.export-btn { color: inherit; text-decoration: none; }
+
+/* Saved indicator */
+.saved-indicator {
+  position: fixed;
+  top: 16px;
+  right: 16px;
+  padding: 8px 16px;
+  background: #dbf3d8;
+  color: #2a7e33;
+  border-radius: 6px;
+  font-size: 13px;
+  font-weight: 500;
+  opacity: 0;
+  transition: opacity 0.3s ease;
+  z-index: 200;
+  pointer-events: none;
+}
+.saved-indicator.show { opacity: 1; }
+"""
 
-<script>
-const API_BASE = '';
+HUB_JS = r"""const API_BASE = '';
 
 // State
 let audits = [];
+let auditCursor = null;
+let loadingMore = false;
+let filterTimer = null;
+let currentRoot = null;
 let currentFeature = null;
 let checklist = null;
 let results = {};
 let notes = {};
 let newRequirements = [];
+let retest = new Set();
+let attachments = {};
+let checklistHash = null;
 let saveTimer = null;
 
 // Init
 async function init() {
+  const list = document.getElementById('sidebar-list');
+  list.addEventListener('scroll', () => {
+    if (list.scrollTop + list.clientHeight > list.scrollHeight - 200) loadMoreAudits();
+  });
   await loadAuditList();
   const params = new URLSearchParams(window.location.search);
   const feature = params.get('feature');
   if (feature) {
-    selectAudit(feature);
+    let root = params.get('root');
+    if (!root) {
+      const match = audits.find(a => a.feature === feature);
+      root = match ? match.root : (audits[0] ? audits[0].root : '');
+    }
+    selectAudit(root, feature);
   }
 }
 
+function rootBase(root) {
+  // Without a known project, the unprefixed routes serve the first one
+  return root ? `${API_BASE}/r/${encodeURIComponent(root)}` : API_BASE;
+}
+
 // Sidebar
+const AUDIT_PAGE_SIZE = 50;
+
+function auditQuery(cursor) {
+  const params = new URLSearchParams({
+    q: document.getElementById('audit-filter').value.trim(),
+    status: document.getElementById('audit-status').value,
+    sort: document.getElementById('audit-sort').value,
+    limit: AUDIT_PAGE_SIZE,
+  });
+  if (cursor) params.set('cursor', cursor);
+  return params;
+}
+
 async function loadAuditList() {
+  auditCursor = null;
   try {
-    const res = await fetch(`${API_BASE}/api/audits`);
+    const res = await fetch(`${API_BASE}/api/audits?${auditQuery()}`);
     audits = await res.json();
+    auditCursor = res.headers.get('X-Next-Cursor');
   } catch (e) {
     audits = [];
   }
   renderSidebar();
 }
 
+async function loadMoreAudits() {
+  if (!auditCursor || loadingMore) return;
+  loadingMore = true;
+  try {
+    const res = await fetch(`${API_BASE}/api/audits?${auditQuery(auditCursor)}`);
+    audits = audits.concat(await res.json());
+    auditCursor = res.headers.get('X-Next-Cursor');
+  } catch (e) {
+    auditCursor = null;
+  }
+  loadingMore = false;
+  renderSidebar();
+}
+
+function onFilterChange() {
+  if (filterTimer) clearTimeout(filterTimer);
+  filterTimer = setTimeout(loadAuditList, 200);
+}
+
 function renderSidebar() {
   const list = document.getElementById('sidebar-list');
   if (audits.length === 0) {
-    list.innerHTML = '<div class="sidebar-empty">No audits found</div>';
+    const filtered = document.getElementById('audit-filter').value.trim() || document.getElementById('audit-status').value;
+    list.innerHTML = `<div class="sidebar-empty">${filtered ? 'No matching audits' : 'No audits found'}</div>`;
     return;
   }
+  const byProject = document.getElementById('audit-sort').value === 'feature';
+  const grouped = byProject && new Set(audits.map(a => a.root)).size > 1;
+  let lastRoot = null;
   list.innerHTML = audits.map(a => {
     const pct_pass = a.total ? (a.pass / a.total * 100) : 0;
     const pct_fail = a.total ? (a.fail / a.total * 100) : 0;
-    return `
-      <div class="sidebar-item ${a.feature === currentFeature ? 'active' : ''}"
-           onclick="selectAudit('${a.feature}')">
+    const header = grouped && a.root !== lastRoot ? `<div class="sidebar-group">${escapeHtml(a.root)}</div>` : '';
+    lastRoot = a.root;
+    const active = a.root === currentRoot && a.feature === currentFeature;
+    return header + `
+      <div class="sidebar-item ${active ? 'active' : ''}"
+           onclick="selectAudit('${a.root}', '${a.feature}')">
         <div class="sidebar-item-title">${a.title}</div>
         <div class="sidebar-progress">
           <div class="sidebar-progress-bar">
@@ -763,12 +3217,18 @@ function renderSidebar() {
       </div>
     `;
   }).join('');
+  // Keep loading pages until the list can scroll
+  if (auditCursor && list.scrollHeight <= list.clientHeight) loadMoreAudits();
 }
 
 // Select audit
-async function selectAudit(feature) {
+async function selectAudit(root, feature) {
+  flushEvents();
+  openedAt = {};
+  currentRoot = root;
   currentFeature = feature;
   const url = new URL(window.location);
+  url.searchParams.set('root', root);
   url.searchParams.set('feature', feature);
   window.history.replaceState({}, '', url);
 
@@ -779,20 +3239,25 @@ async function selectAudit(feature) {
 
   try {
     const [checklistRes, resultsRes] = await Promise.all([
-      fetch(`${API_BASE}/api/audits/${feature}/checklist`),
-      fetch(`${API_BASE}/api/audits/${feature}/results`),
+      fetch(`${rootBase(root)}/api/audits/${feature}/checklist`),
+      fetch(`${rootBase(root)}/api/audits/${feature}/results`),
     ]);
     checklist = await checklistRes.json();
     const savedData = await resultsRes.json();
     results = savedData.results || {};
     notes = savedData.notes || {};
     newRequirements = savedData.new_requirements || [];
+    retest = new Set(savedData.retest || []);
+    attachments = savedData.attachments || {};
+    checklistHash = savedData.checklist_hash || null;
   } catch (e) {
     main.innerHTML = '<div class="main-empty">Failed to load audit</div>';
     return;
   }
 
+  leases = {};
   renderChecklist();
+  loadLeases();
 }
 
 // Render checklist
@@ -821,17 +3286,32 @@ function renderChecklist() {
         </div>
       </div>
 
+      <div class="claim-bar">
+        <input type="text" class="tester-input" id="tester-name" placeholder="Your name" maxlength="60" value="${escapeHtml(tester)}" onchange="setTester(this.value)">
+        <button class="claim-btn" onclick="claimNext()" title="Claim the next untested stories nobody else is working on">Claim next ${CLAIM_BATCH}</button>
+        <button class="claim-btn" onclick="releaseMine()">Release mine</button>
+        <span class="lease-status" id="lease-status"></span>
+      </div>
+
       <div id="sections"></div>
 
       <div class="new-requirements">
         <div class="new-req-title">New Requirements</div>
         <div class="new-req-subtitle">Ideas and requirements discovered during testing — not bugs, but new work</div>
         <div class="new-req-input-row">
-          <input type="text" class="new-req-input" id="new-req-input" placeholder="Type a new requirement and press Enter..." onkeydown="if(event.key==='Enter')addNewRequirement()">
+          <input type="text" class="new-req-input" id="new-req-input" placeholder="Type a new requirement and press Enter..." onkeydown="if(event.key==='Enter')addNewRequirement()" oninput="suggestRequirements(this.value)">
           <button class="new-req-add-btn" onclick="addNewRequirement()">Add</button>
         </div>
+        <div class="new-req-similar" id="new-req-similar"></div>
         <div id="new-req-list"></div>
       </div>
+
+      <div class="timing">
+        <div class="new-req-title">Tester Timing</div>
+        <div class="new-req-subtitle">Median time from opening a story to its verdict, and stories whose verdict keeps changing</div>
+        <button class="export-btn timing-load" onclick="loadTiming()">Show timing</button>
+        <div id="timing-body"></div>
+      </div>
     </div>
 
     <div class="summary-bar">
@@ -839,13 +3319,15 @@ function renderChecklist() {
       <div class="summary-stat"><div class="dot fail"></div> <span id="fail-count">${failCount}</span> failed</div>
       <div class="summary-stat"><div class="dot skip"></div> <span id="skip-count">${skipCount}</span> skipped</div>
       <div class="summary-stat"><div class="dot pending"></div> <span id="pending-count">${total - done}</span> remaining</div>
+      <a class="export-btn" href="${rootBase(currentRoot)}/report/${currentFeature}" target="_blank">Report</a>
+      <button class="export-btn" onclick="closeRound()" title="Save the current results as a round in this audit's history">Close Round</button>
       <button class="export-btn" onclick="exportResults()">Export Results</button>
     </div>
   `;
 
   const container = document.getElementById('sections');
 
-  checklist.sections.forEach(section => {
+  checklist.sections.forEach((section, index) => {
     const sectionEl = document.createElement('div');
     sectionEl.className = 'section';
 
@@ -855,6 +3337,7 @@ function renderChecklist() {
         <div class="section-toggle open">\u25B6</div>
         <div class="section-title">${escapeHtml(section.title)}</div>
         <div class="section-count">${count} stories</div>
+        <button class="claim-section-btn" onclick="claimSection(event, ${index})" title="Claim every story in this section">Claim</button>
       </div>
       <div class="section-body open"></div>
     `;
@@ -879,7 +3362,7 @@ function renderChecklist() {
       storyEl.innerHTML = `
         <div class="story-checkbox${cbClass}" onclick="event.stopPropagation(); cycleCheck('${id}')"></div>
         <div class="story-content">
-          <div class="story-title" onclick="toggleDetail('${id}')">${escapeHtml(story.title)}</div>
+          <div class="story-title" onclick="toggleDetail('${id}')">${escapeHtml(story.title)}${retest.has(id) ? '<span class="retest-badge" title="New or changed since the checklist was regenerated">Retest</span>' : ''}<span class="lease-badge" data-story="${id}"></span></div>
           <div class="story-detail" id="detail-${id}">
             <div class="detail-section">
               <div class="detail-label">Steps</div>
@@ -896,6 +3379,8 @@ function renderChecklist() {
                 <button class="result-btn skip-btn${result === 'skip' ? ' active' : ''}" onclick="event.stopPropagation(); setResult('${id}', 'skip')">Skip</button>
               </div>
               <textarea class="notes-input" id="notes-${id}" placeholder="Notes (optional)..." rows="2" oninput="onNoteChange('${id}', this.value)">${escapeHtml(note)}</textarea>
+            <div class="attachments" id="attachments-${id}">${attachmentsHtml(id)}</div>
+            <label class="attach-btn">+ Attach screenshot<input type="file" accept="image/*" multiple onchange="uploadAttachments('${id}', this)"></label>
             </div>
           </div>
         </div>
@@ -917,7 +3402,14 @@ function toggleSection(header) {
 }
 
 function toggleDetail(id) {
-  document.getElementById(`detail-${id}`).classList.toggle('open');
+  const opened = document.getElementById(`detail-${id}`).classList.toggle('open');
+  if (opened) {
+    openedAt[id] = Date.now();
+    logEvent(id, 'open');
+  } else {
+    logEvent(id, 'close', { ms: elapsedOn(id) });
+    delete openedAt[id];
+  }
 }
 
 function cycleCheck(id) {
@@ -929,13 +3421,19 @@ function cycleCheck(id) {
 }
 
 function setResult(id, result) {
+  logEvent(id, 'verdict', { verdict: result, previous: results[id] || null, ms: elapsedOn(id) });
   if (result === null) {
     delete results[id];
   } else {
     results[id] = result;
+    retest.delete(id);
   }
 
   const story = document.getElementById(`story-${id}`);
+  if (result !== null) {
+    const badge = story.querySelector('.retest-badge');
+    if (badge) badge.remove();
+  }
   const cb = story.querySelector('.story-checkbox');
 
   cb.className = 'story-checkbox' + (result === 'pass' ? ' checked' : result === 'fail' ? ' fail' : result === 'skip' ? ' skip' : '');
@@ -980,7 +3478,7 @@ function updateSummary() {
   document.getElementById('progress-fill-pass').style.width = `${total ? (passCount/total*100) : 0}%`;
   document.getElementById('progress-fill-fail').style.width = `${total ? (failCount/total*100) : 0}%`;
 
-  const audit = audits.find(a => a.feature === currentFeature);
+  const audit = audits.find(a => a.root === currentRoot && a.feature === currentFeature);
   if (audit) {
     audit.pass = passCount;
     audit.fail = failCount;
@@ -999,10 +3497,17 @@ function scheduleSave() {
 async function doSave() {
   if (!currentFeature) return;
   try {
-    const res = await fetch(`${API_BASE}/api/audits/${currentFeature}/results`, {
+    const res = await fetch(`${rootBase(currentRoot)}/api/audits/${currentFeature}/results`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ results, notes, new_requirements: newRequirements }),
+      body: JSON.stringify({
+        results,
+        notes,
+        new_requirements: newRequirements,
+        retest: [...retest],
+        attachments,
+        checklist_hash: checklistHash,
+      }),
     });
     if (res.ok) {
       flashSaved();
@@ -1010,12 +3515,241 @@ async function doSave() {
   } catch (e) {}
 }
 
-function flashSaved() {
+function flashSaved(text = 'Saved') {
   const el = document.getElementById('saved-indicator');
+  el.textContent = text;
   el.classList.add('show');
   setTimeout(() => el.classList.remove('show'), 1500);
 }
 
+// Attachments
+function attachmentsHtml(id) {
+  return (attachments[id] || []).map((a, i) => {
+    const url = `${rootBase(currentRoot)}/blobs/${a.sha256}`;
+    const inner = a.type.startsWith('image/')
+      ? `<a href="${url}" target="_blank"><img src="${url}" alt="${escapeHtml(a.name)}" loading="lazy"></a>`
+      : `<a class="attachment-file" href="${url}" target="_blank">${escapeHtml(a.name)}</a>`;
+    return `<div class="attachment" title="${escapeHtml(a.name)}">${inner}<button class="attachment-remove" onclick="removeAttachment('${id}', ${i})">&times;</button></div>`;
+  }).join('');
+}
+
+async function uploadAttachments(id, input) {
+  for (const file of input.files) {
+    try {
+      const res = await fetch(`${rootBase(currentRoot)}/api/audits/${currentFeature}/stories/${id}/attachments?name=${encodeURIComponent(file.name)}`, {
+        method: 'POST',
+        headers: { 'Content-Type': file.type || 'application/octet-stream' },
+        body: file,
+      });
+      if (!res.ok) continue;
+      (attachments[id] = attachments[id] || []).push(await res.json());
+    } catch (e) {}
+  }
+  input.value = '';
+  document.getElementById(`attachments-${id}`).innerHTML = attachmentsHtml(id);
+  scheduleSave();
+}
+
+function removeAttachment(id, index) {
+  attachments[id].splice(index, 1);
+  if (!attachments[id].length) delete attachments[id];
+  document.getElementById(`attachments-${id}`).innerHTML = attachmentsHtml(id);
+  scheduleSave();
+}
+
+// Timing events: batched, sent off the save path
+const SESSION_ID = Math.random().toString(36).slice(2);
+let eventQueue = [];
+let eventTimer = null;
+let openedAt = {};
+
+function elapsedOn(id) {
+  return openedAt[id] ? Date.now() - openedAt[id] : undefined;
+}
+
+function logEvent(story, type, extra = {}) {
+  if (!currentFeature) return;
+  eventQueue.push({ story, type, session: SESSION_ID, t: Date.now(), ...extra });
+  if (eventQueue.length >= 50) flushEvents();
+  else if (!eventTimer) eventTimer = setTimeout(flushEvents, 10000);
+}
+
+function flushEvents(beacon = false) {
+  if (eventTimer) clearTimeout(eventTimer);
+  eventTimer = null;
+  if (!eventQueue.length || !currentFeature) return;
+  const url = `${rootBase(currentRoot)}/api/audits/${currentFeature}/events`;
+  const body = JSON.stringify({ events: eventQueue });
+  eventQueue = [];
+  if (beacon && navigator.sendBeacon) {
+    navigator.sendBeacon(url, new Blob([body], { type: 'application/json' }));
+  } else {
+    fetch(url, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body, keepalive: true }).catch(() => {});
+  }
+}
+
+window.addEventListener('pagehide', () => flushEvents(true));
+
+function formatMs(ms) {
+  if (ms === null || ms === undefined) return '—';
+  const s = Math.round(ms / 1000);
+  return s < 60 ? `${s}s` : `${Math.floor(s / 60)}m ${s % 60}s`;
+}
+
+async function loadTiming() {
+  flushEvents();
+  const el = document.getElementById('timing-body');
+  let timing;
+  try {
+    const res = await fetch(`${rootBase(currentRoot)}/api/audits/${currentFeature}/timing`);
+    timing = await res.json();
+  } catch (e) {
+    el.innerHTML = '<div class="new-req-subtitle">Failed to load timing</div>';
+    return;
+  }
+  const table = (headers, rows) => `<table class="timing-table"><tr>${headers.map(h => `<th>${h}</th>`).join('')}</tr>` +
+    rows.map(r => `<tr>${r.map(c => `<td>${c}</td>`).join('')}</tr>`).join('') + '</table>';
+  el.innerHTML =
+    table(['Section', 'Median', 'Samples'], timing.sections.map(s => [escapeHtml(s.title || ''), formatMs(s.median_ms), s.samples])) +
+    (timing.flipping.length
+      ? table(['Flipping story', 'Verdict changes'], timing.flipping.map(s => [escapeHtml(s.title || `#${s.id}`), s.flips]))
+      : '') +
+    table(['Story', 'Median', 'Samples', 'Opens'], timing.stories.map(s => [escapeHtml(s.title || `#${s.id}`), formatMs(s.median_ms), s.samples, s.opens]));
+}
+
+// Leases: testers claim stories so they don't test the same ones
+const CLAIM_BATCH = 5;
+let tester = localStorage.getItem('auditTester') || '';
+let leases = {};
+let leaseTtl = 300;
+let lastActivity = Date.now();
+let lastHeartbeat = 0;
+
+['click', 'keydown', 'scroll'].forEach(type =>
+  document.addEventListener(type, () => { lastActivity = Date.now(); }, { capture: true, passive: true }));
+
+function leaseUrl(action = '') {
+  return `${rootBase(currentRoot)}/api/audits/${currentFeature}/leases${action}`;
+}
+
+function setTester(name) {
+  tester = name.trim();
+  localStorage.setItem('auditTester', tester);
+  applyLeases(leases);
+}
+
+async function loadLeases() {
+  if (!currentFeature) return;
+  try {
+    const res = await fetch(leaseUrl());
+    if (!res.ok) return;
+    const data = await res.json();
+    leaseTtl = data.ttl;
+    applyLeases(data.leases);
+  } catch (e) {}
+}
+
+async function leaseRequest(action, body) {
+  if (!currentFeature) return null;
+  if (!tester) {
+    document.getElementById('tester-name').focus();
+    flashSaved('Enter your name first');
+    return null;
+  }
+  try {
+    const res = await fetch(leaseUrl(action), {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ tester, ...body }),
+    });
+    if (!res.ok) return null;
+    const data = await res.json();
+    applyLeases(data.leases);
+    return data;
+  } catch (e) {
+    return null;
+  }
+}
+
+function applyLeases(next) {
+  leases = next || {};
+  document.querySelectorAll('.lease-badge').forEach(el => {
+    const lease = leases[el.dataset.story];
+    const mine = lease && lease.tester === tester;
+    el.textContent = lease ? (mine ? 'You' : lease.tester) : '';
+    el.className = 'lease-badge' + (mine ? ' mine' : '');
+    el.title = lease ? `Claimed by ${lease.tester}` : '';
+  });
+  const counts = {};
+  Object.values(leases).forEach(l => { counts[l.tester] = (counts[l.tester] || 0) + 1; });
+  const status = document.getElementById('lease-status');
+  if (status) {
+    status.textContent = Object.entries(counts)
+      .map(([name, n]) => `${name === tester ? 'You' : name}: ${n}`)
+      .join(' \u00b7 ');
+  }
+}
+
+async function claimNext() {
+  const data = await leaseRequest('', { next: CLAIM_BATCH });
+  if (!data) return;
+  if (!data.claimed.length) {
+    flashSaved('Nothing left to claim');
+    return;
+  }
+  const first = data.claimed[0];
+  document.getElementById(`story-${first}`).scrollIntoView({ behavior: 'smooth', block: 'center' });
+  if (!document.getElementById(`detail-${first}`).classList.contains('open')) toggleDetail(first);
+  flashSaved(`Claimed ${data.claimed.length} stories`);
+}
+
+async function claimSection(event, index) {
+  event.stopPropagation();
+  const data = await leaseRequest('', { section: checklist.sections[index].title });
+  if (!data) return;
+  const held = Object.keys(data.held).length;
+  flashSaved(`Claimed ${data.claimed.length}` + (held ? `, ${held} held by others` : ''));
+}
+
+async function releaseMine() {
+  const data = await leaseRequest('/release', {});
+  if (data) flashSaved(`Released ${data.released.length}`);
+}
+
+// Refresh others' claims; renew ours only while this tester is active, so idle leases expire
+setInterval(async () => {
+  if (!currentFeature || document.hidden) return;
+  const holding = Object.values(leases).some(l => l.tester === tester);
+  const active = Date.now() - lastActivity < leaseTtl * 500;
+  if (holding && active && Date.now() - lastHeartbeat > 60000) {
+    lastHeartbeat = Date.now();
+    await leaseRequest('/heartbeat', {});
+  } else {
+    await loadLeases();
+  }
+}, 15000);
+
+// Rounds
+async function closeRound() {
+  if (!currentFeature) return;
+  if (saveTimer) {
+    clearTimeout(saveTimer);
+    saveTimer = null;
+    await doSave();
+  }
+  try {
+    const res = await fetch(`${rootBase(currentRoot)}/api/audits/${currentFeature}/rounds`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: '{}',
+    });
+    if (res.ok) {
+      const round = await res.json();
+      flashSaved(`Round ${round.round} saved`);
+    }
+  } catch (e) {}
+}
+
 // Export
 function exportResults() {
   const data = {
@@ -1024,6 +3758,8 @@ function exportResults() {
     results: results,
     notes: notes,
     new_requirements: newRequirements,
+    retest: [...retest],
+    attachments: attachments,
   };
   const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' });
   const url = URL.createObjectURL(blob);
@@ -1041,10 +3777,37 @@ function addNewRequirement() {
   if (!text) return;
   newRequirements.push(text);
   input.value = '';
+  document.getElementById('new-req-similar').innerHTML = '';
   renderNewRequirements();
   scheduleSave();
 }
 
+let suggestTimer = null;
+
+function suggestRequirements(text) {
+  if (suggestTimer) clearTimeout(suggestTimer);
+  const box = document.getElementById('new-req-similar');
+  if (text.trim().length < 4) {
+    box.innerHTML = '';
+    return;
+  }
+  suggestTimer = setTimeout(async () => {
+    let matches = [];
+    try {
+      const res = await fetch(`${API_BASE}/api/requirements/similar?q=${encodeURIComponent(text)}&limit=5`);
+      matches = await res.json();
+    } catch (e) {}
+    // Ignore answers for text the tester has already changed
+    if (document.getElementById('new-req-input').value !== text) return;
+    box.innerHTML = matches.length
+      ? 'Already filed elsewhere?' + matches.map(m =>
+          `<div class="new-req-similar-item" onclick="document.getElementById('new-req-input').value = this.dataset.text" data-text="${escapeHtml(m.text)}">` +
+          `${escapeHtml(m.text)}<span class="new-req-similar-source">${escapeHtml(m.root)} / ${escapeHtml(m.feature)}</span></div>`
+        ).join('')
+      : '';
+  }, 250);
+}
+
 function removeNewRequirement(index) {
   newRequirements.splice(index, 1);
   renderNewRequirements();
@@ -1066,27 +3829,352 @@ function renderNewRequirements() {
 function escapeHtml(str) {
   const div = document.createElement('div');
   div.textContent = str;
-  return div.innerHTML;
+  // Quotes too, so the result is also safe inside attribute values
+  return div.innerHTML.replace(/"/g, '&quot;').replace(/'/g, '&#39;');
 }
 
 function linkifyUrls(text) {
   return text.replace(/(https?:\/\/[^\s<]+)/g, '<a href="$1" target="_blank" style="color:#2eaadc">$1</a>');
 }
 
+// Offline support
+if ('serviceWorker' in navigator) {
+  navigator.serviceWorker.register('/sw.js').catch(() => {});
+  navigator.serviceWorker.addEventListener('message', event => {
+    // A cached audit list was shown; the fresh copy from the server differs
+    if (event.data && event.data.type === 'updated' && event.data.kind === 'audits' && !loadingMore) {
+      loadAuditList();
+    }
+  });
+}
+
 // Boot
 init();
-</script>
+"""
 
-</body>
-</html>"""
+# Service worker: serves the shell, audit list and checklists from cache at
+# once and refreshes them in the background; results go to the network first
+# and fall back to the cache when the tunnel drops.
+SW_JS = r"""const CACHE = 'audit-hub-__VERSION__';
+const SHELL = ['/', '__CSS_URL__', '__JS_URL__'];
+const RESULTS_TIMEOUT = 2000;
+
+self.addEventListener('install', event => {
+  event.waitUntil(caches.open(CACHE).then(cache => cache.addAll(SHELL)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(keys.filter(k => k.startsWith('audit-hub-') && k !== CACHE).map(k => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+function kindOf(url, request) {
+  const path = url.pathname.replace(/^\/r\/[^/]+/, '');
+  if (request.mode === 'navigate') {
+    // Reports, attachments and API URLs opened in a tab are not the app
+    return path === '' || path === '/' || path === '/index.html' ? 'shell' : null;
+  }
+  if (url.pathname.startsWith('/assets/') || path.startsWith('/blobs/')) return 'immutable';
+  if (path === '/api/audits') return 'audits';
+  if (/^\/api\/audits\/[^/]+\/checklist$/.test(path)) return 'checklist';
+  if (/^\/api\/audits\/[^/]+\/results$/.test(path)) return 'results';
+  return null;
+}
 
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) (await caches.open(CACHE)).put(request, response.clone());
+  return response;
+}
 
-if __name__ == "__main__":
-    server = HTTPServer(("0.0.0.0", PORT), AuditHandler)
+async function staleWhileRevalidate(event, kind, key) {
+  const cache = await caches.open(CACHE);
+  const cached = await cache.match(key);
+  const refresh = fetch(event.request).then(async response => {
+    if (response.ok) {
+      const changed = cached && (await cached.clone().text()) !== (await response.clone().text());
+      await cache.put(key, response.clone());
+      if (changed) {
+        const client = await self.clients.get(event.clientId);
+        if (client) client.postMessage({ type: 'updated', kind, url: event.request.url });
+      }
+    }
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(refresh.catch(() => {}));
+    return cached;
+  }
+  return refresh;
+}
+
+async function networkFirst(event, request) {
+  const cache = await caches.open(CACHE);
+  // Cache the response whenever it arrives, even after we gave up waiting for it
+  const network = fetch(request).then(response => {
+    if (response.ok) return cache.put(request, response.clone()).then(() => response);
+    return response;
+  });
+  event.waitUntil(network.catch(() => {}));
+  try {
+    return await Promise.race([
+      network,
+      new Promise((_, reject) => setTimeout(() => reject(new Error('timeout')), RESULTS_TIMEOUT)),
+    ]);
+  } catch (e) {
+    const cached = await cache.match(request);
+    if (cached) return cached;
+    // Nothing cached: a slow tunnel is still better than no answer
+    return network;
+  }
+}
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+  const kind = kindOf(url, request);
+  if (kind === 'shell') {
+    // Every page is the same shell; ?feature=... is read by the app itself
+    event.respondWith(staleWhileRevalidate(event, kind, new Request(url.origin + '/')));
+  } else if (kind === 'immutable') {
+    event.respondWith(cacheFirst(request));
+  } else if (kind === 'audits') {
+    // Only the first page of each status/sort view is kept; text searches and
+    // later pages go straight to the network rather than piling up in the cache.
+    if (url.searchParams.get('q') || url.searchParams.has('cursor')) return;
+    event.respondWith(staleWhileRevalidate(event, kind, request));
+  } else if (kind === 'checklist' || kind === 'results') {
+    // Results are re-keyed when a checklist is regenerated, so the two must
+    // come from the server together; a checklist revalidates with a cheap 304.
+    event.respondWith(networkFirst(event, request));
+  }
+});
+"""
+
+
+def _asset(name, ext, content_type, text):
+    body = text.encode()
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    return f"/assets/{name}.{digest}.{ext}", (content_type, body, f'"{digest}"')
+
+
+# Content-hashed URLs: a changed file gets a new URL, so clients may cache forever.
+CSS_URL, _css = _asset("hub", "css", "text/css; charset=utf-8", HUB_CSS)
+JS_URL, _js = _asset("hub", "js", "application/javascript; charset=utf-8", HUB_JS)
+ASSETS = {CSS_URL: _css, JS_URL: _js}
+
+HUB_PAGE = HUB_HTML.format(css_url=CSS_URL, js_url=JS_URL).encode()
+HUB_ETAG = f'"{hashlib.sha256(HUB_PAGE).hexdigest()[:16]}"'
+
+SW_BODY = (
+    # A new worker script also gets a fresh cache, dropping entries the old one kept
+    SW_JS.replace("__VERSION__", hashlib.sha256(HUB_PAGE + SW_JS.encode()).hexdigest()[:16])
+    .replace("__CSS_URL__", CSS_URL)
+    .replace("__JS_URL__", JS_URL)
+    .encode()
+)
+SW_ETAG = f'"{hashlib.sha256(SW_BODY).hexdigest()[:16]}"'
+
+
+def serve_workers(server, workers):
+    """Pre-fork: every worker accepts on the one listening socket the parent bound."""
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_server(server)
+            except (KeyboardInterrupt, SystemExit):
+                pass
+            os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            children.discard(pid)
+            if not stopping:
+                # A worker crashed; keep the pool at full size.
+                spawn()
+    except KeyboardInterrupt:
+        stop(signal.SIGINT, None)
+        for pid in list(children):
+            os.waitpid(pid, 0)
+        raise
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def replay_main(argv):
+    """Re-issue the GET requests of a trace against a running hub, keeping their spacing."""
+    parser = argparse.ArgumentParser(
+        prog="serve.py replay",
+        description="Replay a request trace recorded with --trace against a running hub.",
+    )
+    parser.add_argument("traces", nargs="+", metavar="TRACE", help="JSONL trace files, e.g. trace.jsonl.1 trace.jsonl")
+    parser.add_argument("--target", default=f"http://localhost:{PORT}", help="hub to replay against")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="replay speed: 1 keeps the recorded pacing, 10 is ten times faster, 0 sends back to back",
+    )
+    parser.add_argument("--concurrency", type=int, default=16, help="most requests in flight at once (default: 16)")
+    args = parser.parse_args(argv)
+    if args.speed < 0:
+        parser.error("--speed must not be negative")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    records = []
+    for path in args.traces:
+        with open(path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    records.sort(key=lambda r: r.get("ts") or 0)
+    # Bodies are not traced, so writes cannot be reproduced faithfully; replay reads only.
+    requests = [r for r in records if r.get("method") == "GET" and r.get("path")]
+    skipped = len(records) - len(requests)
+    if not requests:
+        sys.exit("No GET requests to replay")
+    target = args.target.rstrip("/")
+
+    def fetch(record):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(target + record["path"], timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = None
+        return record.get("route"), status, (time.perf_counter() - start) * 1000
+
+    print(f"Replaying {len(requests)} requests against {target}" + (f" at {args.speed:g}x" if args.speed else ""))
+    first = requests[0]["ts"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        futures = []
+        for record in requests:
+            if args.speed:
+                delay = (record["ts"] - first) / args.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(pool.submit(fetch, record))
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for _, status, _ in results)
+    latencies = [ms for _, status, ms in results if status is not None]
+    by_route = {}
+    for route, status, ms in results:
+        if status is not None:
+            by_route.setdefault(route, []).append(ms)
+    print(f"Sent {len(results)} requests in {elapsed:.1f}s ({len(results) / max(elapsed, 1e-9):.1f} req/s)")
+    if skipped:
+        print(f"Skipped {skipped} non-GET requests (request bodies are not traced)")
+    print("Status: " + ", ".join(f"{status or 'error'} x{n}" for status, n in sorted(statuses.items(), key=lambda i: i[0] or 0)))
+    if latencies:
+        print(
+            "Latency ms: "
+            + "  ".join(f"p{int(p * 100)} {_percentile(latencies, p):.1f}" for p in (0.5, 0.95, 0.99))
+            + f"  max {max(latencies):.1f}"
+        )
+    print("\nSlowest routes (p95 ms):")
+    slowest = sorted(by_route.items(), key=lambda i: _percentile(i[1], 0.95), reverse=True)[:10]
+    for route, values in slowest:
+        print(f"  {_percentile(values, 0.95):8.1f}  {len(values):6d}  {route}")
+    if statuses.get(None):
+        sys.exit(1)
+
+
+def main(argv):
+    if argv[:1] == ["replay"]:
+        return replay_main(argv[1:])
+    parser = argparse.ArgumentParser(description="Audit Hub — standalone QA testing server.")
+    parser.add_argument(
+        "dirs",
+        nargs="*",
+        metavar="audits-directory",
+        help="folder containing audit-*.json files, optionally as name=path",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("AUDIT_WORKERS", 1)),
+        help="number of server processes sharing the port (default: 1)",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        default=os.environ.get("AUDIT_TRACE"),
+        help="append a JSONL record of every request to FILE (rotated by size)",
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and (fcntl is None or not hasattr(os, "fork")):
+        parser.error("--workers needs fork() and fcntl locks, which this platform lacks")
+
+    ROOTS.update(parse_roots(args.dirs))
+    global FLUSH_INTERVAL, TRACE
+    if args.workers > 1:
+        # A save held in one worker's memory is invisible to the others and
+        # lost if that worker dies, so write every save before acknowledging it.
+        FLUSH_INTERVAL = 0
+    if args.trace:
+        TRACE = TraceLog(args.trace)
+    server = HubServer(("0.0.0.0", PORT), AuditHandler)
     print(f"Audit Hub running at http://localhost:{PORT}")
-    print(f"Serving audits from {DIR}")
+    for root in ROOTS.values():
+        print(f"Serving audits from {root.dir}" + (f" as /r/{root.name}/" if len(ROOTS) > 1 else ""))
+    if args.workers > 1:
+        print(f"Using {args.workers} worker processes")
+    if TRACE:
+        print(f"Tracing requests to {TRACE.path}")
     print("Press Ctrl+C to stop\n")
     try:
-        server.serve_forever()
-    except KeyboardInterrupt:
+        if args.workers > 1:
+            serve_workers(server, args.workers)
+        else:
+            run_server(server)
+    except (KeyboardInterrupt, SystemExit):
         print("\nStopped.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])